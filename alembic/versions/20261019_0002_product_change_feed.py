@@ -0,0 +1,155 @@
+"""Product change feed: change sequence, tombstones and NOTIFY triggers
+
+Revision ID: 20261019_0002
+Revises: 20251126_0001
+Create Date: 2026-10-19 09:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0002"
+down_revision = "20251126_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # change_seq = (writing transaction's xid8 << 24) | low 24 bits of a sequence.
+    # Ordering by it orders by transaction first, so the feed can publish exactly
+    # the changes of transactions older than its snapshot's xmin: every one of
+    # them has finished, and anything committing later sorts after them. Values
+    # are unique while a transaction stamps fewer than 2^24 rows, and fit a bigint
+    # while the xid epoch is below 2^7.
+    op.execute("CREATE SEQUENCE products_change_seq")
+    op.execute(
+        """
+        CREATE FUNCTION products_next_change_seq() RETURNS bigint AS $$
+            SELECT (pg_current_xact_id()::text::bigint << 24) | (nextval('products_change_seq') & 16777215)
+        $$ LANGUAGE sql VOLATILE
+        """
+    )
+
+    op.add_column("products", sa.Column("change_seq", sa.BigInteger(), nullable=True))
+    op.add_column("products", sa.Column("changed_at", sa.DateTime(timezone=True), nullable=True))
+    # Backfill existing rows in id order so the initial feed replays the catalog;
+    # plain sequence values sort before every transaction-stamped one
+    op.execute(
+        """
+        UPDATE products p
+        SET change_seq = s.seq, changed_at = p.updated_at
+        FROM (SELECT id, nextval('products_change_seq') AS seq FROM (SELECT id FROM products ORDER BY id) o) s
+        WHERE p.id = s.id
+        """
+    )
+    op.create_index("ix_products_change_seq", "products", ["change_seq"], unique=False)
+
+    # Deleted products (and TRUNCATE / retention horizon markers) for the feed
+    op.create_table(
+        "product_tombstones",
+        sa.Column("change_seq", sa.BigInteger(), primary_key=True),
+        sa.Column("product_id", sa.BigInteger(), nullable=True),
+        sa.Column("sku", sa.String(length=128), nullable=True),
+        sa.Column("op", sa.String(length=16), nullable=False),  # delete | truncate | horizon
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("clock_timestamp()")),
+    )
+    op.create_index(
+        "ix_product_tombstones_horizon",
+        "product_tombstones",
+        ["change_seq"],
+        unique=False,
+        postgresql_where=sa.text("op = 'horizon'"),
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION products_stamp_change() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := products_next_change_seq();
+            NEW.changed_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_stamp_change
+        BEFORE INSERT OR UPDATE ON products
+        FOR EACH ROW EXECUTE FUNCTION products_stamp_change()
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION products_record_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO product_tombstones (change_seq, product_id, sku, op)
+            VALUES (products_next_change_seq(), OLD.id, OLD.sku, 'delete');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_record_delete
+        AFTER DELETE ON products
+        FOR EACH ROW EXECUTE FUNCTION products_record_delete()
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION products_record_truncate() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO product_tombstones (change_seq, op) VALUES (products_next_change_seq(), 'truncate');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_record_truncate
+        AFTER TRUNCATE ON products
+        FOR EACH STATEMENT EXECUTE FUNCTION products_record_truncate()
+        """
+    )
+    # Statement-level so an import batch sends one notification, not one per row;
+    # identical payloads are also collapsed per transaction by Postgres.
+    op.execute(
+        """
+        CREATE FUNCTION products_notify_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('product_changes', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_notify_change
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON products
+        FOR EACH STATEMENT EXECUTE FUNCTION products_notify_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS products_notify_change ON products")
+    op.execute("DROP TRIGGER IF EXISTS products_record_truncate ON products")
+    op.execute("DROP TRIGGER IF EXISTS products_record_delete ON products")
+    op.execute("DROP TRIGGER IF EXISTS products_stamp_change ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_notify_change()")
+    op.execute("DROP FUNCTION IF EXISTS products_record_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS products_record_delete()")
+    op.execute("DROP FUNCTION IF EXISTS products_stamp_change()")
+    op.execute("DROP FUNCTION IF EXISTS products_next_change_seq()")
+    op.drop_index("ix_product_tombstones_horizon", table_name="product_tombstones")
+    op.drop_table("product_tombstones")
+    op.drop_index("ix_products_change_seq", table_name="products")
+    op.drop_column("products", "changed_at")
+    op.drop_column("products", "change_seq")
+    op.execute("DROP SEQUENCE IF EXISTS products_change_seq")
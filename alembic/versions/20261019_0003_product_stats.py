@@ -0,0 +1,145 @@
+"""Incrementally maintained product statistics
+
+Revision ID: 20261019_0003
+Revises: 20261019_0002
+Create Date: 2026-10-19 14:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0003"
+down_revision = "20261019_0002"
+branch_labels = None
+depends_on = None
+
+# Counter rows per key; writers pick one by backend pid so concurrent imports
+# don't queue on a single hot row. Keep in sync with app.stats.STATS_SLOTS.
+STATS_SLOTS = 16
+
+# Aggregate one transition table (or two, for updates) into per-key deltas and
+# merge them into this backend's slot. ORDER BY key keeps row-lock order stable
+# between concurrent writers sharing a slot.
+APPLY_DELTAS = """
+        INSERT INTO product_stats (slot, key, value)
+        SELECT pg_backend_pid() % {slots}, kv.key, sum(kv.value)
+        FROM ({rows}) r
+        CROSS JOIN LATERAL (VALUES
+            ('total', r.sign::numeric),
+            ('active', CASE WHEN r.active THEN r.sign ELSE 0 END::numeric),
+            ('price_sum', r.sign * coalesce(r.price, 0)),
+            ('priced', CASE WHEN r.price IS NULL THEN 0 ELSE r.sign END::numeric),
+            ('bucket:' || product_price_bucket(r.price), r.sign::numeric)
+        ) AS kv(key, value)
+        GROUP BY kv.key
+        HAVING sum(kv.value) <> 0
+        ORDER BY kv.key
+        ON CONFLICT (slot, key) DO UPDATE SET value = product_stats.value + EXCLUDED.value;
+"""
+
+STATS_TRIGGERS = {
+    "products_stats_insert": ("INSERT", "REFERENCING NEW TABLE AS new_rows", "SELECT 1 AS sign, active, price FROM new_rows"),
+    "products_stats_update": (
+        "UPDATE",
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        "SELECT 1 AS sign, active, price FROM new_rows UNION ALL SELECT -1, active, price FROM old_rows",
+    ),
+    "products_stats_delete": ("DELETE", "REFERENCING OLD TABLE AS old_rows", "SELECT -1 AS sign, active, price FROM old_rows"),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_stats",
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("value", sa.Numeric(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("slot", "key", name="pk_product_stats"),
+    )
+
+    # Buckets must match app.stats.PRICE_BUCKETS
+    op.execute(
+        """
+        CREATE FUNCTION product_price_bucket(price numeric) RETURNS text AS $$
+            SELECT CASE
+                WHEN price IS NULL THEN 'none'
+                WHEN price < 10 THEN '0-10'
+                WHEN price < 25 THEN '10-25'
+                WHEN price < 50 THEN '25-50'
+                WHEN price < 100 THEN '50-100'
+                WHEN price < 250 THEN '100-250'
+                WHEN price < 500 THEN '250-500'
+                WHEN price < 1000 THEN '500-1000'
+                ELSE '1000+'
+            END
+        $$ LANGUAGE sql IMMUTABLE
+        """
+    )
+
+    # Statement-level with transition tables: an import batch (one multi-row
+    # upsert, see app.tasks.upsert_batch_sql) merges its whole delta at once
+    # instead of touching counters per row.
+    for name, (event, referencing, rows) in STATS_TRIGGERS.items():
+        op.execute(
+            f"""
+            CREATE FUNCTION {name}() RETURNS trigger AS $$
+            BEGIN
+                {APPLY_DELTAS.format(slots=STATS_SLOTS, rows=rows)}
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON products {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}()
+            """
+        )
+    op.execute(
+        """
+        CREATE FUNCTION products_stats_truncate() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM product_stats;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER products_stats_truncate
+        AFTER TRUNCATE ON products
+        FOR EACH STATEMENT EXECUTE FUNCTION products_stats_truncate()
+        """
+    )
+
+    # Seed from the existing catalog
+    op.execute(
+        """
+        INSERT INTO product_stats (slot, key, value)
+        SELECT 0, kv.key, sum(kv.value)
+        FROM (SELECT 1 AS sign, active, price FROM products) r
+        CROSS JOIN LATERAL (VALUES
+            ('total', r.sign::numeric),
+            ('active', CASE WHEN r.active THEN r.sign ELSE 0 END::numeric),
+            ('price_sum', r.sign * coalesce(r.price, 0)),
+            ('priced', CASE WHEN r.price IS NULL THEN 0 ELSE r.sign END::numeric),
+            ('bucket:' || product_price_bucket(r.price), r.sign::numeric)
+        ) AS kv(key, value)
+        GROUP BY kv.key
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS products_stats_truncate ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_stats_truncate()")
+    for name in STATS_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON products")
+        op.execute(f"DROP FUNCTION IF EXISTS {name}()")
+    op.execute("DROP FUNCTION IF EXISTS product_price_bucket(numeric)")
+    op.drop_table("product_stats")
@@ -0,0 +1,71 @@
+"""Workload-aligned product indexes
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19 18:00:00
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_0004"
+down_revision = "20261019_0003"
+branch_labels = None
+depends_on = None
+
+
+# NULL if the index doesn't exist; false if it is left over from a failed
+# CREATE INDEX CONCURRENTLY (it is still maintained on writes but never used)
+INDEX_VALID_SQL = sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+
+
+def _index_valid(name: str) -> Optional[bool]:
+    return op.get_bind().execute(INDEX_VALID_SQL, {"name": name}).scalar()
+
+
+def _create_index_concurrently(name: str, definition: str) -> None:
+    """CREATE INDEX CONCURRENTLY that recovers from an earlier failed build.
+
+    A failed or cancelled concurrent build leaves an INVALID index behind, which
+    IF NOT EXISTS would silently accept, so an invalid one is dropped and rebuilt.
+    """
+    valid = _index_valid(name)
+    if valid:
+        return
+    if valid is not None:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY {name} ON {definition}")
+    if not _index_valid(name):
+        raise RuntimeError(f"Index {name} is not valid after CREATE INDEX CONCURRENTLY")
+
+
+def upgrade() -> None:
+    # pg_trgm is a trusted extension (PG13+), so the database owner can create it
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY so upgrading a live catalog doesn't block imports and writes
+    with op.get_context().autocommit_block():
+        # list_products: WHERE active = ? ORDER BY id DESC LIMIT n is a backward
+        # range scan of this index, with no sort and no scan of the other flag
+        _create_index_concurrently("ix_products_active_id", "products (active, id)")
+        # name filter is ILIKE '%term%', which a btree can't serve
+        _create_index_concurrently("ix_products_name_trgm", "products USING gin (name gin_trgm_ops)")
+        # Superseded: a prefix of ix_products_active_id, and a btree on name is
+        # unused. Dropped only once their replacements are valid, so a failed
+        # build never leaves the list queries without an index.
+        if _index_valid("ix_products_active_id"):
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_active")
+        if _index_valid("ix_products_name_trgm"):
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_name")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        _create_index_concurrently("ix_products_name", "products (name)")
+        _create_index_concurrently("ix_products_active", "products (active)")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_products_active_id")
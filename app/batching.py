@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+
+class AdaptiveBatchSizer:
+    """Tune import batch size from measured commit latency and payload bytes.
+
+    After each batch the observed per-row commit cost is used to steer the size
+    toward `target_ms` per batch. Growth is capped at 2x per step while a slow
+    batch (over 1.5x target) shrinks immediately, so lock hold times drop as soon
+    as the database comes under contention. A smoothed bytes-per-row estimate caps
+    the size so wide rows never exceed `max_bytes` per statement.
+    """
+
+    def __init__(
+        self,
+        initial: int = 5000,
+        minimum: int = 500,
+        maximum: int = 50_000,
+        target_ms: float = 500.0,
+        max_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_ms = target_ms
+        self.max_bytes = max_bytes
+        self.size = self._clamp(initial)
+        self.adjustments = 0
+        self._row_bytes: Optional[float] = None
+        self._last: Dict[str, Any] = {}
+
+    def _clamp(self, value: float) -> int:
+        return int(min(self.maximum, max(self.minimum, value)))
+
+    def record(self, rows: int, nbytes: int, elapsed_s: float) -> int:
+        """Feed back one committed batch and return the next batch size."""
+        if rows <= 0:
+            return self.size
+        elapsed_ms = elapsed_s * 1000.0
+        row_bytes = nbytes / rows
+        self._row_bytes = row_bytes if self._row_bytes is None else 0.7 * self._row_bytes + 0.3 * row_bytes
+
+        per_row_ms = max(elapsed_ms / rows, 1e-6)
+        ideal = self.target_ms / per_row_ms
+        if elapsed_ms > self.target_ms * 1.5:
+            proposed = ideal
+        else:
+            proposed = min(self.size + (ideal - self.size) * 0.5, self.size * 2)
+        if self._row_bytes:
+            proposed = min(proposed, self.max_bytes / self._row_bytes)
+
+        new_size = self._clamp(proposed)
+        if new_size != self.size:
+            self.adjustments += 1
+        self._last = {
+            "last_batch_rows": rows,
+            "last_batch_bytes": nbytes,
+            "last_batch_ms": round(elapsed_ms, 1),
+        }
+        self.size = new_size
+        return self.size
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current controller state for progress reporting."""
+        return {
+            "batch_size": self.size,
+            "target_ms": self.target_ms,
+            "adjustments": self.adjustments,
+            **self._last,
+        }
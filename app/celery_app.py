@@ -1,40 +1,77 @@
 from __future__ import annotations
 
-import ssl
+import logging
+import os
 from celery import Celery
+from kombu import Queue
+from celery.signals import worker_init, worker_process_shutdown
 from .config import settings
+from .producer import apply_common_config
+
+logger = logging.getLogger(__name__)
 
 celery_app = Celery(
     "acme_importer",
     broker=settings.broker_url,
     backend=settings.result_backend,
+    # Task modules load when a worker starts; this module never imports them itself
     include=["app.tasks"],
 )
+apply_common_config(celery_app)
 
-celery_app.conf.broker_use_ssl = {
-    "ssl_cert_reqs": ssl.CERT_NONE
-}
+# Without SERVICE a Celery process would get the api profile, which has no
+# queues: the worker would consume only `celery` and never run imports or
+# webhooks. Default it to the all-queues worker role instead.
+if settings.service is None:
+    settings.service = "worker"
 
-celery_app.conf.redis_backend_use_ssl = {
-    "ssl_cert_reqs": ssl.CERT_NONE
-}
+_profile = settings.role_profile()
 
 celery_app.conf.update(
-    task_serializer="json",
-    result_serializer="json",
-    accept_content=["json"],
-    worker_concurrency=2,
+    worker_concurrency=_profile.get("concurrency", 2),
+    worker_prefetch_multiplier=_profile.get("prefetch_multiplier", 1),
+    worker_pool=_profile.get("pool", "prefork"),
     task_acks_late=True,
-    broker_heartbeat=30,
-    broker_pool_limit=10,
+    # Periodic maintenance, run by the beat role (SERVICE=beat)
+    beat_schedule={
+        "prune-change-tombstones": {"task": "prune_change_tombstones", "schedule": 60 * 60},
+        "prune-error-reports": {"task": "prune_error_reports", "schedule": 60 * 60},
+        "prune-spools": {"task": "prune_spools", "schedule": 60 * 60},
+        "reconcile-product-stats": {"task": "reconcile_product_stats", "schedule": settings.stats_reconcile_interval_s},
+    },
 )
 
-try:
-    from . import tasks as _tasks
-except Exception:
-    pass
+if _profile.get("queues"):
+    # A worker consumes the queues of its role unless -Q is given
+    celery_app.conf.task_queues = [Queue(name) for name in _profile["queues"]]
 
 
 @celery_app.task(name="ping")
 def ping() -> str:
     return "pong"
+
+
+@worker_init.connect
+def _start_metrics_exporter(sender=None, **_kwargs) -> None:
+    """Serve worker-side Prometheus metrics; see app.metrics for prefork setup."""
+    port = _profile.get("metrics_port")
+    if not port:
+        return
+    from .metrics import MULTIPROCESS, start_worker_exporter
+
+    # worker_init runs in the prefork parent, whose own registry never sees the
+    # children's samples; without the shared directory the exporter would serve
+    # nothing but empty series
+    pool = getattr(sender, "pool_cls", None) or celery_app.conf.worker_pool
+    pool_name = pool if isinstance(pool, str) else getattr(pool, "__module__", "")
+    if "prefork" in pool_name and not MULTIPROCESS:
+        logger.error("Not starting the metrics exporter: prefork workers need PROMETHEUS_MULTIPROC_DIR")
+        return
+    start_worker_exporter(port)
+
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(pid=None, **_kwargs) -> None:
+    from .metrics import mark_process_dead
+
+    mark_process_dead(pid or os.getpid())
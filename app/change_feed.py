@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import select
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from .config import settings
+from .serialization import product_row
+
+logger = logging.getLogger(__name__)
+
+# Channel the statement-level trigger on products notifies (see migration 20261019_0002)
+CHANNEL = "product_changes"
+
+# Upserts come from the live products row (so repeated updates collapse into the
+# latest one), deletes/truncates from tombstones. change_seq leads with the
+# writing transaction's id (see migration 20261019_0002), so every change below
+# the snapshot's xmin watermark belongs to a finished transaction, and nothing
+# can commit below it later. Changes at or above it are `visible` = false.
+CHANGES_SQL = text(
+    """
+    WITH watermark AS (SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint << 24 AS seq)
+    (SELECT change_seq, 'upsert' AS op, id AS product_id, sku, name, description, price, active,
+            created_at, updated_at,
+            change_seq < (SELECT seq FROM watermark) AS visible
+     FROM products
+     WHERE change_seq > :since
+     ORDER BY change_seq
+     LIMIT :limit)
+    UNION ALL
+    (SELECT change_seq, op, product_id, sku, NULL, NULL, NULL, NULL, NULL, NULL,
+            change_seq < (SELECT seq FROM watermark) AS visible
+     FROM product_tombstones
+     WHERE change_seq > :since AND op <> 'horizon'
+     ORDER BY change_seq
+     LIMIT :limit)
+    ORDER BY change_seq
+    LIMIT :limit
+    """
+)
+
+HORIZON_SQL = text("SELECT max(change_seq) FROM product_tombstones WHERE op = 'horizon'")
+
+
+class CursorExpired(Exception):
+    """The requested cursor is older than the retained tombstones; the consumer must resync."""
+
+    def __init__(self, horizon: int):
+        super().__init__(f"Cursor is behind the retention horizon {horizon}")
+        self.horizon = horizon
+
+
+def _change_item(row: Any) -> Dict[str, Any]:
+    item: Dict[str, Any] = {"seq": row.change_seq, "op": row.op, "id": row.product_id, "sku": row.sku}
+    if row.op == "upsert":
+        item["product"] = product_row(
+            (row.sku, row.name, row.description, row.price, row.active, row.product_id, row.created_at, row.updated_at)
+        )
+    return item
+
+
+def fetch_changes(db: Session, since: int, limit: int) -> Tuple[List[Dict[str, Any]], int, bool, bool]:
+    """One page of changes after `since`: (items, next cursor, more available now, held back).
+
+    The page stops at the first change from a transaction at or above the
+    snapshot's xmin. A still-running older transaction could yet commit changes
+    that sort before it, so the cursor must not move past it until that one ends.
+    """
+    # since=0 replays live rows plus the retained tombstones, which is a complete
+    # snapshot on its own, so a new consumer can always start there
+    if since > 0:
+        horizon = db.execute(HORIZON_SQL).scalar()
+        if horizon is not None and since < horizon:
+            raise CursorExpired(horizon)
+
+    rows = db.execute(CHANGES_SQL, {"since": since, "limit": limit}).all()
+    items: List[Dict[str, Any]] = []
+    held_back = False
+    for row in rows:
+        if not row.visible:
+            held_back = True
+            break
+        items.append(_change_item(row))
+    next_since = items[-1]["seq"] if items else since
+    has_more = len(items) == limit
+    return items, next_since, has_more, held_back
+
+
+class ChangeListener:
+    """One LISTEN connection per process fanning notifications out to SSE subscribers.
+
+    The connection lives in a daemon thread started on first subscribe, so the
+    number of streaming clients doesn't change the number of database
+    connections. Subscribers get an asyncio.Event set on their own loop;
+    notifications are only a wake-up, the feed itself is always read by cursor.
+
+    A stream whose last page was held back behind a running transaction asks
+    for a retry; the listener thread's own tick wakes all of those together
+    every change_feed_retry_s, so idle streams never wake on a timer.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._retries: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self) -> asyncio.Event:
+        event = asyncio.Event()
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), event))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="change-feed-listener", daemon=True)
+                self._thread.start()
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not event}
+            self._retries = {s for s in self._retries if s[1] is not event}
+
+    def retry_later(self, event: asyncio.Event) -> None:
+        """Wake `event` on the next retry tick even if nothing is notified."""
+        with self._lock:
+            self._retries.add((asyncio.get_running_loop(), event))
+
+    def _wake_all(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._retries.clear()
+        self._wake(subscribers)
+
+    def _wake_retries(self) -> None:
+        with self._lock:
+            retries = list(self._retries)
+            self._retries.clear()
+        self._wake(retries)
+
+    @staticmethod
+    def _wake(subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]) -> None:
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed (e.g. worker shutting down)
+                pass
+
+    def _run(self) -> None:
+        backoff = 1.0
+        engine = create_engine(settings.change_feed_listen_url or settings.database_url, poolclass=NullPool)
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    engine.dispose()
+                    return
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                backoff = 1.0
+                # Anything committed while (re)connecting was missed; have subscribers re-read
+                self._wake_all()
+                next_retry = time.monotonic() + settings.change_feed_retry_s
+                while True:
+                    with self._lock:
+                        if not self._subscribers:
+                            break
+                    timeout = max(next_retry - time.monotonic(), 0.0)
+                    ready, _, _ = select.select([conn], [], [], timeout)
+                    if ready:
+                        conn.poll()
+                        if conn.notifies:
+                            conn.notifies.clear()
+                            self._wake_all()
+                    if time.monotonic() >= next_retry:
+                        self._wake_retries()
+                        next_retry = time.monotonic() + settings.change_feed_retry_s
+            except Exception:
+                logger.warning("Change feed listener connection failed; retrying in %.0fs", backoff, exc_info=True)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+
+change_listener = ChangeListener()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import gzip
+import io
+import zipfile
+from typing import BinaryIO, Optional
+
+from .config import settings
+
+# Accepted upload names, longest suffix first so ".csv.gz" wins over ".gz"
+SUPPORTED_SUFFIXES = (".csv.gz", ".csv.zst", ".zip", ".csv")
+# Formats that can be decompressed from a forward-only stream (zip needs its central directory)
+STREAMABLE_SUFFIXES = (".csv.gz", ".csv.zst", ".csv")
+# Below this much output the ratio guard is not applied; tiny files compress extremely well
+RATIO_GUARD_MIN_BYTES = 10 * 1024 * 1024
+
+
+class DecompressionLimitError(ValueError):
+    """Raised when decompressed output exceeds the size or ratio guard."""
+
+
+def upload_suffix(filename: str) -> Optional[str]:
+    """Return the supported suffix of `filename` (lowercased), or None."""
+    lower = filename.lower()
+    for suffix in SUPPORTED_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix
+    return None
+
+
+class _CountingReader(io.RawIOBase):
+    """Counts compressed bytes pulled from the underlying stream."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self._raw = raw
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._raw.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def readinto(self, b) -> int:
+        data = self._raw.read(len(b))
+        n = len(data)
+        b[:n] = data
+        self.count += n
+        return n
+
+    def close(self) -> None:
+        try:
+            self._raw.close()
+        finally:
+            super().close()
+
+
+class _LimitedReader(io.RawIOBase):
+    """Enforces the decompressed size cap and compression-ratio guard."""
+
+    def __init__(self, inner: BinaryIO, counter: _CountingReader, max_bytes: int, max_ratio: float) -> None:
+        self._inner = inner
+        self._counter = counter
+        self._max_bytes = max_bytes
+        self._max_ratio = max_ratio
+        self.total = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self._inner.read(len(b))
+        n = len(data)
+        self.total += n
+        if self.total > self._max_bytes:
+            raise DecompressionLimitError(
+                f"Decompressed size exceeds limit of {self._max_bytes // (1024 * 1024)}MB"
+            )
+        if self.total > RATIO_GUARD_MIN_BYTES and self.total > self._max_ratio * max(1, self._counter.count):
+            raise DecompressionLimitError(
+                f"Compression ratio exceeds {self._max_ratio:g}:1; refusing possible decompression bomb"
+            )
+        b[:n] = data
+        return n
+
+    def close(self) -> None:
+        try:
+            self._inner.close()
+            self._counter.close()
+        finally:
+            super().close()
+
+
+def _open_zip_member(raw: BinaryIO) -> BinaryIO:
+    zf = zipfile.ZipFile(raw)
+    members = [i for i in zf.infolist() if not i.is_dir() and i.filename.lower().endswith(".csv")]
+    if len(members) != 1:
+        raise ValueError("Zip upload must contain exactly one .csv file")
+    info = members[0]
+    if info.file_size > settings.max_decompressed_bytes:
+        raise DecompressionLimitError(
+            f"Decompressed size exceeds limit of {settings.max_decompressed_bytes // (1024 * 1024)}MB"
+        )
+    return zf.open(info)
+
+
+def open_decompressed(raw: BinaryIO, suffix: Optional[str]) -> BinaryIO:
+    """Wrap a binary stream of an upload so reads yield decompressed CSV bytes.
+
+    The decompressed size limit and ratio guard apply to every format, including
+    plain CSV (where the ratio is always 1).
+    """
+    counter = _CountingReader(raw)
+    if suffix == ".csv.gz":
+        inner: BinaryIO = gzip.GzipFile(fileobj=counter, mode="rb")
+    elif suffix == ".csv.zst":
+        import zstandard
+
+        inner = zstandard.ZstdDecompressor().stream_reader(counter, read_across_frames=True)
+    elif suffix == ".zip":
+        inner = _open_zip_member(counter)
+    else:
+        inner = counter
+    limited = _LimitedReader(inner, counter, settings.max_decompressed_bytes, settings.max_compression_ratio)
+    return io.BufferedReader(limited, buffer_size=1024 * 1024)
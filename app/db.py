@@ -1,25 +1,106 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Generator
+from typing import Dict, Generator, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import NullPool, QueuePool
+from starlette.requests import Request
 
 from .config import settings
+from .metrics import DB_POOL_CHECKOUT_WAIT_SECONDS
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    future=True,
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+def _engine_options() -> dict:
+    """Pool options for this process's role (see ROLE_PROFILES in config)."""
+    if settings.db_pool_mode == "null":
+        # PgBouncer transaction pooling: no client-side pool, so no stale
+        # connections to pre-ping and nothing pinned across transactions.
+        return {"poolclass": NullPool, "future": True}
+    profile = settings.role_profile()
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_pre_ping": True,
+        "pool_size": profile["pool_size"],
+        "max_overflow": profile["max_overflow"],
+        "future": True,
+    }
+
+
+# Engines are created on first use, not at import: creating one loads the DB
+# driver and sizes the pool, which processes that never query (or query later)
+# shouldn't pay for at startup.
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def _lazy_engine(name: str, url: str, **extra) -> Engine:
+    eng = _engines.get(name)
+    if eng is None:
+        with _engines_lock:
+            eng = _engines.get(name)
+            if eng is None:
+                eng = _engines[name] = create_engine(url, **_engine_options(), **extra)
+    return eng
+
+
+def get_engine() -> Engine:
+    """The primary engine."""
+    return _lazy_engine("primary", settings.database_url)
+
+
+def get_replica_engine() -> Optional[Engine]:
+    """The read replica engine (REPLICA_DATABASE_URL), or None if not configured."""
+    if not settings.replica_database_url:
+        return None
+    # Bounded connect: an unresponsive replica host must fail the lag check fast
+    # rather than hang on the TCP connect timeout
+    return _lazy_engine(
+        "replica",
+        settings.replica_database_url,
+        connect_args={"connect_timeout": settings.replica_connect_timeout_s},
+    )
+
+
+def __getattr__(name: str):
+    # Module attributes kept for callers that still import `engine` / `replica_engine`
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engine":
+        return get_replica_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Session factories; bound to their engine when a session is opened
+SessionLocal = sessionmaker(autoflush=False, autocommit=False, future=True)
+# Optional read replica for read-only routes (REPLICA_DATABASE_URL)
+ReplicaSessionLocal = (
+    sessionmaker(autoflush=False, autocommit=False, future=True)
+    if settings.replica_database_url
+    else None
 )
 
-# Session factory
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# Cookie carrying the epoch time until which a client's reads stay on the primary
+READ_YOUR_WRITES_COOKIE = "acme_rw_until"
 
 # Base class for ORM models
 Base = declarative_base()
@@ -28,7 +109,7 @@ Base = declarative_base()
 @contextmanager
 def get_session() -> Generator[Session, None, None]:
     """Provide a transactional scope around a series of operations."""
-    session: Session = SessionLocal()
+    session: Session = SessionLocal(bind=get_engine())
     try:
         yield session
         session.commit()
@@ -43,3 +124,96 @@ def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency to provide a database session per-request."""
     with get_session() as session:
         yield session
+
+
+class ReplicaMonitor:
+    """Caches replica health and replay lag, refreshed at most every check interval."""
+
+    # Lag is 0 when a streaming standby has replayed everything it received (or on a
+    # primary standing in for a replica); otherwise the age of the last replayed
+    # transaction. A standby whose WAL receiver isn't streaming also has receive =
+    # replay, but may be stale by any amount, so its lag is unknown (NULL).
+    # Reading pg_stat_wal_receiver.status needs pg_monitor (or pg_read_all_stats).
+    LAG_SQL = text(
+        """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+        """
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self.healthy = False
+        self.lag_s: Optional[float] = None
+
+    def refresh(self) -> None:
+        replica_engine = get_replica_engine()
+        if replica_engine is None:
+            return
+        try:
+            with replica_engine.connect() as conn:
+                lag = conn.execute(self.LAG_SQL).scalar_one()
+            self.lag_s = None if lag is None else float(lag)
+            self.healthy = True
+            if lag is None:
+                logger.warning("Replica WAL receiver is not streaming, routing reads to primary")
+        except Exception as e:
+            logger.warning(f"Replica check failed, routing reads to primary: {e}")
+            self.healthy = False
+            self.lag_s = None
+
+    def usable(self) -> bool:
+        """True if the replica is reachable and within REPLICA_MAX_LAG_S."""
+        if not settings.replica_database_url:
+            return False
+        if time.monotonic() - self._checked_at >= settings.replica_check_interval_s:
+            # One request refreshes; the rest answer from the cached state instead
+            # of queueing behind a check that may be waiting on an unresponsive host
+            if self._lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._checked_at >= settings.replica_check_interval_s:
+                        self.refresh()
+                        self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self.healthy and self.lag_s is not None and self.lag_s <= settings.replica_max_lag_s
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def _sticky_to_primary(request: Request) -> bool:
+    raw = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if not raw:
+        return False
+    try:
+        return float(raw) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """FastAPI dependency for read-only routes.
+
+    Uses the replica when configured, healthy and within the lag guard, unless
+    the client wrote recently (read-your-writes cookie); otherwise the primary.
+    `session.info["replica"]` tells handlers which one they got.
+    """
+    if ReplicaSessionLocal is None or _sticky_to_primary(request) or not replica_monitor.usable():
+        with get_session() as session:
+            session.info["replica"] = False
+            yield session
+        return
+    session: Session = ReplicaSessionLocal(bind=get_replica_engine())
+    session.info["replica"] = True
+    try:
+        yield session
+    finally:
+        # Read-only: nothing to commit
+        session.rollback()
+        session.close()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class DuplicateTracker:
+    """Detect repeated SKU keys across a whole import with bounded memory.
+
+    Keys (``lower(sku)``) are held in memory until ``max_in_memory`` distinct keys
+    have been seen. Past that point the tracker spills to hash-partitioned files
+    on disk and duplicates are resolved partition by partition in ``finalize()``.
+    """
+
+    def __init__(self, max_in_memory: int = 200_000, partitions: int = 64) -> None:
+        self.max_in_memory = max_in_memory
+        self.partitions = partitions
+        self._seen: Dict[str, int] = {}
+        self._spill_dir: Optional[str] = None
+        self._files: List = []
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_dir is not None
+
+    def add(self, key: str, row: int) -> Optional[int]:
+        """Record `key` at data row `row`.
+
+        Returns the row number it supersedes when the duplicate can be detected
+        immediately (in-memory mode), otherwise None.
+        """
+        if self._spill_dir is not None:
+            self._write(key, row)
+            return None
+        prev = self._seen.get(key)
+        self._seen[key] = row
+        if prev is None and len(self._seen) > self.max_in_memory:
+            self._spill()
+        return prev
+
+    def finalize(self) -> Iterator[Tuple[str, int, int]]:
+        """Yield (key, superseded_row, winning_row) for duplicates found on disk."""
+        if self._spill_dir is None:
+            return
+        for fh in self._files:
+            fh.close()
+        for part in range(self.partitions):
+            last: Dict[str, int] = {}
+            with open(self._path(part), "r", encoding="utf-8") as fh:
+                for line in fh:
+                    key, row = json.loads(line)
+                    prev = last.get(key)
+                    if prev is not None:
+                        yield key, prev, row
+                    last[key] = row
+
+    def close(self) -> None:
+        for fh in self._files:
+            try:
+                fh.close()
+            except Exception:
+                pass
+        self._files = []
+        self._seen = {}
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _path(self, part: int) -> str:
+        return os.path.join(self._spill_dir or "", f"part-{part:04d}.jsonl")
+
+    def _spill(self) -> None:
+        self._spill_dir = tempfile.mkdtemp(prefix="import_dedup_")
+        self._files = [open(self._path(p), "w", encoding="utf-8") for p in range(self.partitions)]
+        # Rows already seen in memory are written in first-seen order; duplicates
+        # among them were already reported, so only the latest row per key is kept.
+        for key, row in sorted(self._seen.items(), key=lambda kv: kv[1]):
+            self._write(key, row)
+        self._seen = {}
+
+    def _write(self, key: str, row: int) -> None:
+        part = zlib.crc32(key.encode("utf-8")) % self.partitions
+        self._files[part].write(json.dumps([key, row]) + "\n")
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import settings
+
+# Report layout, per import task in settings.error_report_dir:
+#   <task_id>.ndjson.gz  concatenated gzip members, one JSON error record per line
+#   <task_id>.idx        one "<first record index> <byte offset> <records>" line per member
+# Both files are append-only. A member is only indexed after it is fully written,
+# so readers (including downloads of a running import) never see a torn record.
+
+
+def _paths(task_id: str) -> Tuple[str, str]:
+    base = os.path.join(settings.error_report_dir, task_id)
+    return f"{base}.ndjson.gz", f"{base}.idx"
+
+
+class ErrorReportWriter:
+    """Buffers import error records and appends them to the report as gzip members."""
+
+    def __init__(self, task_id: str, member_records: int = 1000) -> None:
+        self.data_path, self.index_path = _paths(task_id)
+        self.member_records = member_records
+        self.count = 0
+        self._buffer: List[bytes] = []
+        os.makedirs(settings.error_report_dir, exist_ok=True)
+        # A redelivered task starts its report over
+        for path in (self.data_path, self.index_path):
+            open(path, "wb").close()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        if len(self._buffer) >= self.member_records:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        member = gzip.compress(b"".join(self._buffer), compresslevel=6)
+        with open(self.data_path, "ab") as f:
+            offset = f.tell()
+            f.write(member)
+        with open(self.index_path, "a") as f:
+            f.write(f"{self.count} {offset} {len(self._buffer)}\n")
+        self.count += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _read_index(task_id: str) -> Optional[List[Tuple[int, int, int]]]:
+    _, index_path = _paths(task_id)
+    try:
+        with open(index_path) as f:
+            entries = [tuple(int(v) for v in line.split()) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    # A writer may be mid-line; keep complete entries only
+    return [e for e in entries if len(e) == 3]
+
+
+def report_total(task_id: str) -> Optional[int]:
+    """Number of records in the report so far, or None if there is no report."""
+    index = _read_index(task_id)
+    if index is None:
+        return None
+    return sum(records for _, _, records in index)
+
+
+def iter_report(task_id: str, offset: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield error records starting at `offset`, seeking straight to the member holding it."""
+    index = _read_index(task_id)
+    if not index:
+        return
+    data_path, _ = _paths(task_id)
+    pos = max(bisect.bisect_right([first for first, _, _ in index], offset) - 1, 0)
+    remaining = limit
+    with open(data_path, "rb") as f:
+        for i in range(pos, len(index)):
+            first, byte_offset, records = index[i]
+            f.seek(byte_offset)
+            # The last indexed member may be followed by one appended after the
+            # index was read; decompressobj stops at the end of this member.
+            raw = f.read(index[i + 1][1] - byte_offset) if i + 1 < len(index) else f.read()
+            lines = zlib.decompressobj(wbits=31).decompress(raw).splitlines()
+            for n, line in enumerate(lines[:records], start=first):
+                if n < offset:
+                    continue
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    remaining -= 1
+                yield json.loads(line)
+
+
+def render_ndjson(records: Iterator[Dict[str, Any]], chunk_records: int = 500) -> Iterator[bytes]:
+    buf: List[bytes] = []
+    for record in records:
+        buf.append(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+        if len(buf) >= chunk_records:
+            yield b"".join(buf)
+            buf.clear()
+    if buf:
+        yield b"".join(buf)
+
+
+def render_csv(records: Iterator[Dict[str, Any]], chunk_records: int = 500) -> Iterator[bytes]:
+    """CSV with row and error columns followed by the raw record's columns."""
+    out = io.StringIO()
+    writer: Optional[csv.DictWriter] = None
+    pending = 0
+    for record in records:
+        flat = {"row": record.get("row"), "error": record.get("error"), **(record.get("data") or {})}
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=list(flat), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow(flat)
+        pending += 1
+        if pending >= chunk_records:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+            pending = 0
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+def prune_reports(max_age_s: float) -> int:
+    """Delete report files not modified within `max_age_s`; returns files removed."""
+    try:
+        names = os.listdir(settings.error_report_dir)
+    except FileNotFoundError:
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for name in names:
+        path = os.path.join(settings.error_report_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
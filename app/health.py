@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from .config import settings
+from .db import get_engine, get_replica_engine, replica_monitor
+from .producer import get_producer
+from .utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def _check_database() -> Dict[str, Any]:
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {}
+
+
+def _check_redis() -> Dict[str, Any]:
+    get_redis_client().ping()
+    return {}
+
+
+def _check_broker() -> Dict[str, Any]:
+    with get_producer().connection_for_write() as conn:
+        conn.ensure_connection(max_retries=1, interval_start=0, interval_step=0, timeout=settings.health_probe_timeout_s)
+    return {}
+
+
+def _check_replica() -> Dict[str, Any]:
+    replica_monitor.refresh()
+    if not replica_monitor.healthy:
+        raise RuntimeError("replica unreachable")
+    if replica_monitor.lag_s is None:
+        raise RuntimeError("replica WAL receiver not streaming")
+    return {"lag_s": replica_monitor.lag_s}
+
+
+def _pool_stats(pool: Any) -> Dict[str, Any]:
+    """Checkout counters for QueuePool; NullPool (PgBouncer mode) has none."""
+    stats: Dict[str, Any] = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+
+class HealthProber:
+    """Refreshes dependency status in the background; /health serves the snapshot.
+
+    Each check runs in a worker thread with a timeout. A check still stuck from
+    an earlier round is reported as timed out rather than started again, so a
+    saturated database costs at most one pool connection here.
+    """
+
+    def __init__(self) -> None:
+        self.checks: Dict[str, Callable[[], Dict[str, Any]]] = {
+            "database": _check_database,
+            "redis": _check_redis,
+            "broker": _check_broker,
+        }
+        if settings.replica_database_url:
+            self.checks["replica"] = _check_replica
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_check(self, name: str, check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        pending = self._inflight.get(name)
+        if pending is not None and not pending.done():
+            return {"status": "error", "error": "previous probe still running"}
+        start = time.perf_counter()
+        future = asyncio.ensure_future(asyncio.to_thread(check))
+        # Retrieve the outcome of abandoned (timed out) probes so it isn't logged as unhandled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[name] = future
+        try:
+            # shield: a timeout abandons the wait, not the thread
+            details = await asyncio.wait_for(asyncio.shield(future), timeout=settings.health_probe_timeout_s)
+            result = {"status": "ok", **details}
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"timed out after {settings.health_probe_timeout_s}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)[:100]}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def probe(self) -> Dict[str, Any]:
+        names = list(self.checks)
+        results = await asyncio.gather(*(self._run_check(n, self.checks[n]) for n in names))
+        checks = dict(zip(names, results))
+        pools = {"primary": _pool_stats(get_engine().pool)}
+        replica_engine = get_replica_engine()
+        if replica_engine is not None:
+            pools["replica"] = _pool_stats(replica_engine.pool)
+        # The replica is optional: reads fall back to the primary when it is down
+        required = [checks[n]["status"] == "ok" for n in ("database", "redis", "broker")]
+        self.snapshot = {
+            "status": "healthy" if all(required) else "degraded",
+            "env": settings.environment,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "checks": checks,
+            "pools": pools,
+        }
+        self._checked_at = time.monotonic()
+        return self.snapshot
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception:
+                logger.warning("Health probe round failed", exc_info=True)
+            await asyncio.sleep(settings.health_probe_interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="health-prober")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def age_s(self) -> Optional[float]:
+        if self.snapshot is None:
+            return None
+        return time.monotonic() - self._checked_at
+
+    def is_stale(self) -> bool:
+        age = self.age_s()
+        return age is None or age > settings.health_stale_after_s
+
+
+health_prober = HealthProber()
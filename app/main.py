@@ -1,53 +1,133 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy import text
+from fastapi.responses import JSONResponse, Response
 
 from .config import settings
-from .db import engine
-from .utils import get_redis_client
+from .db import READ_YOUR_WRITES_COOKIE
+from .health import health_prober
+from .metrics import HTTP_REQUEST_SECONDS, render_metrics
 from .routers.products import router as products_router
 from .routers.uploads import router as uploads_router
 from .routers.webhooks import router as webhooks_router
 
-app = FastAPI(title=settings.app_name)
 
-# CORS
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    health_prober.start()
+    yield
+    await health_prober.stop()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+
+# CORS. The UI sends credentials (the read-your-writes cookie), and browsers
+# reject "*" on credentialed responses, so a wildcard mirrors the caller's origin.
+cors_origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in settings.cors_origins.split(",")],
+    allow_origins=[o for o in cors_origins if o != "*"],
+    allow_origin_regex=".*" if "*" in cors_origins else None,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Browsers only send SameSite=Lax cookies on same-site requests, so a UI on
+# another site would never send the read-your-writes cookie back. Cross-site it
+# has to be SameSite=None, which browsers only accept together with Secure.
+rw_cookie_samesite = (settings.read_your_writes_samesite or ("none" if cors_origins else "lax")).lower()
 
-@app.get("/health")
-def health():
-    """Health check with dependency status (DB, Redis)."""
-    checks = {"env": settings.environment}
-    
-    # Check database
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        checks["database"] = "ok"
-    except Exception as e:
-        checks["database"] = f"error: {str(e)[:100]}"
-    
-    # Check Redis
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Observe request latency per route template (e.g. /products/{product_id})."""
+    start = time.perf_counter()
+    status = 500
     try:
-        get_redis_client().ping()
-        checks["redis"] = "ok"
-    except Exception as e:
-        checks["redis"] = f"error: {str(e)[:100]}"
-    
-    # Overall status
-    all_ok = checks.get("database") == "ok" and checks.get("redis") == "ok"
-    checks["status"] = "healthy" if all_ok else "degraded"
-    
-    status_code = 200 if all_ok else 503
-    return JSONResponse(checks, status_code=status_code)
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(request.method, path, str(status)).observe(time.perf_counter() - start)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, pin the client's reads to the primary for a short window."""
+    response = await call_next(request)
+    if (
+        settings.replica_database_url
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(time.time() + settings.read_your_writes_s),
+            max_age=int(settings.read_your_writes_s) + 1,
+            httponly=True,
+            samesite=rw_cookie_samesite,
+            secure=rw_cookie_samesite == "none",
+        )
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus exposition for the API process."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+@app.get("/health")
+async def health():
+    """Dependency status (DB, Redis, broker) from the background prober's last snapshot.
+
+    async so it runs on the event loop: a threadpool saturated by DB-blocked
+    handlers can't queue it.
+    """
+    snapshot = health_prober.snapshot
+    if snapshot is None:
+        return JSONResponse({"status": "starting", "env": settings.environment}, status_code=503)
+    checks = snapshot["checks"]
+    body = {
+        **snapshot,
+        # Flat per-dependency fields kept for existing consumers
+        "database": _summary(checks["database"]),
+        "redis": _summary(checks["redis"]),
+        "broker": _summary(checks["broker"]),
+        "age_s": round(health_prober.age_s(), 3),
+    }
+    if health_prober.is_stale():
+        body["status"] = "degraded"
+    status_code = 200 if body["status"] == "healthy" else 503
+    return JSONResponse(body, status_code=status_code)
+
+
+def _summary(check: dict) -> str:
+    return "ok" if check["status"] == "ok" else f"error: {check.get('error', '')}"
+
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process and its event loop are responsive. Touches no dependency."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: required dependencies were reachable in a recent probe."""
+    snapshot = health_prober.snapshot
+    ready = snapshot is not None and snapshot["status"] == "healthy" and not health_prober.is_stale()
+    body = {"status": "ready" if ready else "not_ready"}
+    if snapshot is not None:
+        body["failing"] = [name for name, c in snapshot["checks"].items() if c["status"] != "ok"]
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 
 @app.get("/")
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+# With several processes per role (uvicorn --workers, Celery prefork), set
+# PROMETHEUS_MULTIPROC_DIR to a shared, empty directory so every exporter
+# aggregates samples from all processes.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --- CSV import ---
+IMPORT_STAGE_SECONDS = Histogram(
+    "acme_import_stage_seconds",
+    "Time spent per import stage (count, parse, validate, db, progress, errors) per import",
+    ["stage"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+IMPORT_BATCH_COMMIT_SECONDS = Histogram(
+    "acme_import_batch_commit_seconds",
+    "Wall time of one import batch upsert transaction",
+    buckets=_LATENCY_BUCKETS,
+)
+IMPORT_BATCH_ROWS = Histogram(
+    "acme_import_batch_rows",
+    "Rows per import batch as chosen by the adaptive sizer",
+    buckets=(500, 1000, 2500, 5000, 10000, 20000, 50000),
+)
+IMPORT_ROWS_PER_SECOND = Histogram(
+    "acme_import_rows_per_second",
+    "Overall import throughput per completed import",
+    buckets=(500, 1000, 2500, 5000, 10000, 20000, 40000, 80000),
+)
+IMPORT_ROWS_TOTAL = Counter(
+    "acme_import_rows_total",
+    "CSV rows by outcome (processed, error, duplicate)",
+    ["outcome"],
+)
+IMPORTS_TOTAL = Counter("acme_imports_total", "Finished imports by status", ["status"])
+
+# --- Webhooks ---
+WEBHOOK_DELIVERY_SECONDS = Histogram(
+    "acme_webhook_delivery_seconds",
+    "Webhook HTTP delivery latency",
+    ["webhook_id", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+WEBHOOK_DELIVERIES_TOTAL = Counter(
+    "acme_webhook_deliveries_total",
+    "Webhook delivery attempts by outcome",
+    ["webhook_id", "outcome"],
+)
+
+# --- Database / HTTP ---
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "acme_db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "acme_http_request_seconds",
+    "HTTP request latency per route template",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+
+class StageTimer:
+    """Accumulates wall time per named stage for one import."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def observe(self) -> Dict[str, float]:
+        """Publish the totals to IMPORT_STAGE_SECONDS and return them rounded."""
+        for stage, seconds in self.totals.items():
+            IMPORT_STAGE_SECONDS.labels(stage).observe(seconds)
+        return {stage: round(seconds, 3) for stage, seconds in self.totals.items()}
+
+
+def _registry() -> CollectorRegistry:
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition for this process (or all processes in multiprocess mode)."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter(port: int) -> None:
+    start_http_server(port, registry=_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -7,12 +7,16 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Computed,
     DateTime,
+    FetchedValue,
     Integer,
     Numeric,
+    SmallInteger,
     String,
     Text,
     Index,
+    UniqueConstraint,
     func,
 )
 
@@ -23,18 +27,26 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
-    sku = Column(String(128), nullable=False)  # Case-insensitive unique enforced via migration index on LOWER(sku)
+    sku = Column(String(128), nullable=False)
+    # Generated lower(sku); carries the case-insensitive unique constraint, so
+    # filter on this column (not func.lower(sku)) to use uq_products_sku_ci
+    sku_ci = Column(Text, Computed("lower(sku)", persisted=True), nullable=False)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     price = Column(Numeric(12, 2), nullable=True)
     active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # Change feed position; stamped by a database trigger on every insert/update
+    change_seq = Column(BigInteger, nullable=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
+    changed_at = Column(DateTime(timezone=True), nullable=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
 
     __table_args__ = (
-        Index("ix_products_name", "name"),
-        Index("ix_products_active", "active"),
-        # Functional unique index on LOWER(sku) will be created via Alembic migration for PostgreSQL
+        UniqueConstraint("sku_ci", name="uq_products_sku_ci"),
+        # list_products: active filter ordered by id, and ILIKE name search
+        Index("ix_products_active_id", "active", "id"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_products_change_seq", "change_seq"),
     )
 
 
@@ -55,3 +67,25 @@ class Webhook(Base):
     __table_args__ = (
         Index("ix_webhooks_event_type_enabled", "event_type", "enabled"),
     )
+
+
+class ProductTombstone(Base):
+    """Change feed entries for deleted products (plus truncate/retention horizon markers)."""
+
+    __tablename__ = "product_tombstones"
+
+    change_seq = Column(BigInteger, primary_key=True)
+    product_id = Column(BigInteger, nullable=True)
+    sku = Column(String(128), nullable=True)
+    op = Column(String(16), nullable=False)  # delete | truncate | horizon
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.clock_timestamp())
+
+
+class ProductStat(Base):
+    """Sharded catalog counters maintained by triggers on products (see app.stats)."""
+
+    __tablename__ = "product_stats"
+
+    slot = Column(SmallInteger, primary_key=True)
+    key = Column(String(64), primary_key=True)
+    value = Column(Numeric, nullable=False, server_default="0")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import ssl
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+# Queue per task; shared with the worker app so producers and consumers agree
+TASK_ROUTES: Dict[str, Dict[str, str]] = {
+    "import_csv": {"queue": "imports"},
+    "purge_products": {"queue": "imports"},
+    "prune_change_tombstones": {"queue": "imports"},
+    "reconcile_product_stats": {"queue": "imports"},
+    "prune_error_reports": {"queue": "imports"},
+    "prune_spools": {"queue": "imports"},
+    # Separate queues so slow webhook retries never sit in front of imports
+    "send_webhook": {"queue": "webhooks"},
+}
+
+_producer = None
+_producer_lock = threading.Lock()
+
+
+def apply_common_config(app: Any) -> None:
+    """Broker/backend settings shared by the worker app and the API-side producer."""
+    app.conf.broker_use_ssl = {"ssl_cert_reqs": ssl.CERT_NONE}
+    app.conf.redis_backend_use_ssl = {"ssl_cert_reqs": ssl.CERT_NONE}
+    app.conf.update(
+        task_serializer="json",
+        result_serializer="json",
+        accept_content=["json"],
+        broker_heartbeat=30,
+        broker_pool_limit=10,
+        task_routes=TASK_ROUTES,
+    )
+
+
+def get_producer() -> Any:
+    """Celery app used to enqueue tasks by name, created on first use.
+
+    Inside a worker (or anything that already imported app.celery_app) this is
+    the full worker app. Elsewhere, notably the API, it is a send-only app that
+    doesn't import task modules, so Celery and the task code stay off the API's
+    import path until the first enqueue.
+    """
+    global _producer
+    if _producer is None:
+        with _producer_lock:
+            if _producer is None:
+                worker_module = sys.modules.get("app.celery_app")
+                if worker_module is not None:
+                    _producer = worker_module.celery_app
+                else:
+                    from celery import Celery
+
+                    producer = Celery("acme_importer", broker=settings.broker_url, backend=settings.result_backend)
+                    apply_common_config(producer)
+                    _producer = producer
+    return _producer
+
+
+def send_task(
+    name: str,
+    args: Optional[list] = None,
+    kwargs: Optional[Dict[str, Any]] = None,
+    **options: Any,
+) -> Any:
+    """Enqueue a task by name; returns its AsyncResult."""
+    return get_producer().send_task(name, args=args, kwargs=kwargs, **options)
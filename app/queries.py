@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import Select, func, select
+
+from .models import Product
+from .serialization import PRODUCT_COLUMNS
+
+# Each filter is written against the index that serves it (see migration
+# 20261019_0004); benchmarks/query_plans.py checks the plans stay that way.
+
+
+def product_list_query(
+    sku: Optional[str] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    active: Optional[bool] = None,
+) -> Select:
+    """Filtered ProductOut columns for list_products, without ordering or paging."""
+    query = select(*PRODUCT_COLUMNS)
+    if sku:
+        # Case-insensitive exact match on the generated column: uq_products_sku_ci
+        query = query.where(Product.sku_ci == func.lower(sku))
+    if name:
+        # Substring match: trigram index ix_products_name_trgm
+        query = query.where(Product.name.ilike(f"%{name}%"))
+    if description:
+        # Unindexed (a trigram index on long text costs too much on imports);
+        # combine with another filter on large catalogs
+        query = query.where(Product.description.ilike(f"%{description}%"))
+    if active is not None:
+        query = query.where(Product.active == active)
+    return query
+
+
+def product_page_query(query: Select, page: int, page_size: int) -> Select:
+    """Newest first. With an active filter this is a backward scan of ix_products_active_id."""
+    return query.order_by(Product.id.desc()).offset((page - 1) * page_size).limit(page_size)
+
+
+def product_count_query(query: Select) -> Select:
+    return select(func.count()).select_from(query.subquery())
@@ -1,25 +1,61 @@
 from __future__ import annotations
 
-from typing import Optional, List
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select, update, delete
-from sqlalchemy.exc import IntegrityError
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
+from sse_starlette.sse import EventSourceResponse
 
-from app.db import get_db
+from app.change_feed import CursorExpired, change_listener, fetch_changes
+from app.config import settings
+from app.db import get_db, get_read_db, get_session
 from app.models import Product
+from app.producer import send_task
+from app.queries import product_count_query, product_list_query, product_page_query
 from app.schemas import (
     ProductCreate,
     ProductUpdate,
     ProductOut,
     PaginatedResponse,
 )
+from app.serialization import PRODUCT_COLUMNS, FastJSONResponse, dumps, product_row
+from app.stats import read_stats
+from app.utils import bump_catalog_version, clear_import_hashes, get_catalog_version, init_progress
 from app.webhooks_service import enqueue_event
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match comparison (weak comparison, as required for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _product_etag(product_id: int, updated_at: datetime) -> str:
+    return f'"p{product_id}-{int(updated_at.timestamp() * 1_000_000)}"'
+
+
+def _product_item(prod: Product) -> Dict[str, Any]:
+    """A loaded Product in the same JSON shape GET /products/{id} serves."""
+    return product_row(tuple(getattr(prod, col.key) for col in PRODUCT_COLUMNS))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
 @router.get("/", response_model=PaginatedResponse)
 def list_products(
     sku: Optional[str] = Query(default=None),
@@ -28,29 +64,41 @@ def list_products(
     active: Optional[bool] = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=200),
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
 ):
-    query = select(Product)
-
-    if sku:
-        # Case-insensitive exact match (uses functional index on LOWER(sku))
-        query = query.where(func.lower(Product.sku) == func.lower(sku))
-    if name:
-        query = query.where(Product.name.ilike(f"%{name}%"))
-    if description:
-        query = query.where(Product.description.ilike(f"%{description}%"))
-    if active is not None:
-        query = query.where(Product.active == active)
+    # Conditional GET: any product write or import batch bumps the catalog
+    # version, so an unchanged version answers 304 without touching the DB.
+    # The version carries a random epoch, so ETags from before a Redis reset
+    # (or a missed bump) never match again.
+    version = get_catalog_version()
+    etag = None
+    if version is not None:
+        params = repr((sku, name, description, active, page, page_size)).encode()
+        etag = f'"c{version}-{hashlib.sha1(params).hexdigest()[:16]}"'
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
 
-    total = db.execute(
-        select(func.count()).select_from(query.subquery())
-    ).scalar_one()
+    # Fast path: select plain row tuples and encode them straight to JSON,
+    # skipping ORM identity-map work and pydantic re-validation. The JSON
+    # contract is still PaginatedResponse (declared as response_model for docs).
+    query = product_list_query(sku=sku, name=name, description=description, active=active)
+    total = db.execute(product_count_query(query)).scalar_one()
+    query = product_page_query(query, page, page_size)
 
-    query = query.order_by(Product.id.desc()).offset((page - 1) * page_size).limit(page_size)
+    rows = db.execute(query).all()
 
-    rows = db.execute(query).scalars().all()
-
-    return PaginatedResponse(total=total, page=page, page_size=page_size, items=rows)
+    headers = {}
+    # A lagging replica may return data older than `version`; only label
+    # responses whose data is known to be at least that fresh.
+    if etag and not db.info.get("replica"):
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    return FastJSONResponse({
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "items": [product_row(r) for r in rows],
+    }, headers=headers)
 
 
 @router.post("/", response_model=ProductOut, status_code=201)
@@ -66,33 +114,136 @@ def create_product(payload: ProductCreate, db: Session = Depends(get_db)):
     try:
         db.flush()
         db.refresh(prod)
+        item = _product_item(prod)
         # Commit transaction before webhook dispatch to avoid blocking
         db.commit()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=409, detail="Product with this SKU already exists (case-insensitive)")
-    
+    bump_catalog_version()
+
     # Fire webhook outside transaction (fire-and-forget)
     try:
         from datetime import datetime
         enqueue_event("product.created", {
-            "id": prod.id,
-            "sku": prod.sku,
-            "name": prod.name,
+            "id": item["id"],
+            "sku": item["sku"],
+            "name": item["name"],
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception:
         pass  
-    
-    return prod
+
+    # Same serializer (and ETag) as GET /products/{id}
+    etag = _product_etag(item["id"], item["updated_at"])
+    return FastJSONResponse(item, status_code=201, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def _cursor_expired(exc: CursorExpired) -> HTTPException:
+    return HTTPException(
+        status_code=410,
+        detail=f"Cursor is older than the retained change history (horizon {exc.horizon}); resync from /products",
+    )
+
+
+@router.get("/stats")
+def product_stats(db: Session = Depends(get_read_db)):
+    """Catalog counts, price distribution and freshness from maintained counters.
+
+    Reads a few dozen counter rows instead of scanning products, so the cost
+    doesn't grow with the catalog.
+    """
+    return FastJSONResponse(read_stats(db))
+
+
+@router.get("/changes")
+def list_changes(
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=500, ge=1),
+    db: Session = Depends(get_db),
+):
+    """Changes after the `since` cursor in change_seq order.
+
+    Pass the returned `next_since` back as `since` to page; `has_more` means
+    another page is available immediately. Reads the primary: a lagging
+    replica would hide changes the cursor then skips.
+    """
+    try:
+        items, next_since, has_more, _ = fetch_changes(db, since, min(limit, settings.change_feed_page_max))
+    except CursorExpired as exc:
+        raise _cursor_expired(exc)
+    return FastJSONResponse({"items": items, "next_since": next_since, "has_more": has_more})
+
+
+@router.get("/changes/stream")
+async def stream_changes(since: int = Query(default=0, ge=0)) -> EventSourceResponse:
+    """Server-sent events for changes after `since` (event id = change_seq).
+
+    Re-reads only when the process-wide LISTEN connection is notified, or, while
+    changes are held back behind a running transaction, on the listener's
+    shared retry tick. An idle stream issues no queries.
+    """
+
+    def read_page(cursor: int):
+        with get_session() as db:
+            return fetch_changes(db, cursor, settings.change_feed_page_max)
+
+    try:
+        first_page = await run_in_threadpool(read_page, since)
+    except CursorExpired as exc:
+        raise _cursor_expired(exc)
+
+    async def event_generator() -> AsyncGenerator[Dict[str, Any], None]:
+        wakeup = change_listener.subscribe()
+        # Changes committed between the first read and subscribing sent their
+        # NOTIFY before we listened; read once more to pick them up
+        wakeup.set()
+        page = first_page
+        try:
+            while True:
+                items, cursor, has_more, held_back = page
+                for item in items:
+                    yield {"event": "change", "id": str(item["seq"]), "data": dumps(item).decode()}
+                if not has_more:
+                    if held_back:
+                        change_listener.retry_later(wakeup)
+                    await wakeup.wait()
+                wakeup.clear()
+                try:
+                    page = await run_in_threadpool(read_page, cursor)
+                except CursorExpired as exc:
+                    yield {"event": "reset", "data": str(exc.horizon)}
+                    return
+        finally:
+            change_listener.unsubscribe(wakeup)
+
+    return EventSourceResponse(event_generator())
 
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    prod = db.get(Product, product_id)
-    if not prod:
+def get_product(
+    product_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_read_db),
+):
+    # Cheap primary-key probe of updated_at first; the full row is only read
+    # when the client's ETag is stale.
+    if if_none_match:
+        updated_at = db.execute(
+            select(Product.updated_at).where(Product.id == product_id)
+        ).scalar_one_or_none()
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        etag = _product_etag(product_id, updated_at)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+    row = db.execute(select(*PRODUCT_COLUMNS).where(Product.id == product_id)).one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return prod
+    item = product_row(row)
+    etag = _product_etag(product_id, item["updated_at"])
+    return FastJSONResponse(item, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 
 @router.put("/{product_id}", response_model=ProductOut)
@@ -116,25 +267,28 @@ def update_product(product_id: int, payload: ProductUpdate, db: Session = Depend
         prod.updated_at = func.now()
         db.flush()
         db.refresh(prod)
+        item = _product_item(prod)
         # Commit transaction before webhook dispatch
         db.commit()
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Update failed due to integrity constraints")
-    
+    bump_catalog_version()
+
     # Fire webhook outside transaction
     try:
         from datetime import datetime
         enqueue_event("product.updated", {
-            "id": prod.id,
-            "sku": prod.sku,
-            "name": prod.name,
+            "id": item["id"],
+            "sku": item["sku"],
+            "name": item["name"],
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception:
         pass
-    
-    return prod
+
+    etag = _product_etag(item["id"], item["updated_at"])
+    return FastJSONResponse(item, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 
 @router.delete("/{product_id}", status_code=204)
@@ -146,7 +300,8 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     payload = {"id": prod.id, "sku": prod.sku, "name": prod.name}
     db.delete(prod)
     db.commit()
-    
+    bump_catalog_version()
+
     # Fire webhook outside transaction
     try:
         from datetime import datetime
@@ -159,26 +314,52 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/", response_model=dict)
-def delete_all_products(confirm: bool = Query(default=False), db: Session = Depends(get_db)):
+def delete_all_products(
+    confirm: bool = Query(default=False),
+    active: Optional[bool] = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """Bulk delete products.
+
+    Without filters this TRUNCATEs the table when its lock can be taken within
+    PURGE_TRUNCATE_LOCK_TIMEOUT_MS. Filtered deletes (e.g. active=false), and
+    unfiltered ones that cannot get the lock (e.g. while an import runs), are
+    handed to the chunked `purge_products` background task; follow it through
+    /uploads/progress/{task_id}.
+    """
     if not confirm:
         raise HTTPException(status_code=400, detail="Set confirm=true to delete all products")
 
-    # Get count before delete for webhook payload
-    count_before = db.execute(select(func.count()).select_from(Product)).scalar_one()
-    
-    # Efficient bulk delete
-    result = db.execute(delete(Product))
-    deleted = result.rowcount or 0
-    db.commit()
-    
-    # Fire bulk delete webhook event
-    try:
-        from datetime import datetime
-        enqueue_event("products.bulk_deleted", {
-            "count": deleted,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-    except Exception:
-        pass
-    
-    return {"deleted": deleted}
+    if active is None:
+        try:
+            # Bound the wait for ACCESS EXCLUSIVE so we never queue behind (and
+            # block everything behind us on) a long-running writer.
+            db.execute(
+                text("SELECT set_config('lock_timeout', :timeout, true)"),
+                {"timeout": f"{settings.purge_truncate_lock_timeout_ms}ms"},
+            )
+            # Planner estimate instead of an exact count(*) scan
+            estimate = db.execute(
+                text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = 'products'::regclass")
+            ).scalar_one()
+            db.execute(text("TRUNCATE products"))
+            db.commit()
+        except OperationalError:
+            db.rollback()
+        else:
+            bump_catalog_version()
+            clear_import_hashes()
+            try:
+                enqueue_event("products.bulk_deleted", {
+                    "count": estimate,
+                    "approximate": True,
+                    "timestamp": datetime.utcnow().isoformat(),
+                })
+            except Exception:
+                pass
+            return {"deleted": estimate, "approximate": True, "mode": "truncate"}
+
+    task_id = str(uuid.uuid4())
+    init_progress(task_id)
+    send_task("purge_products", kwargs={"active": active}, task_id=task_id)
+    return JSONResponse({"task_id": task_id, "mode": "background", "status": "queued"}, status_code=202)
@@ -1,32 +1,92 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import os
 import tempfile
-from typing import AsyncGenerator, Dict, Any
+import uuid
+from datetime import datetime
+from typing import AsyncGenerator, Dict, Any, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sse_starlette.sse import EventSourceResponse
+from starlette.requests import ClientDisconnect
 
-from app.celery_app import celery_app
-from app.utils import get_progress, get_errors, get_errors_count
+from app.compression import STREAMABLE_SUFFIXES, SUPPORTED_SUFFIXES, upload_suffix
+from app.config import settings
+from app.error_report import iter_report, render_csv, render_ndjson, report_total
+from app.producer import send_task
+from app.spool import new_spool_id, open_spool, spool_source
+from app.utils import (
+    get_progress,
+    get_errors,
+    get_errors_count,
+    get_warnings,
+    set_progress,
+    get_import_record,
+    claim_import_hash,
+    release_import_hash,
+)
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
+# Enforce max upload size on the bytes received (compressed size for .gz/.zst/.zip);
+# the worker separately caps the decompressed size.
+MAX_SIZE = settings.max_upload_bytes
+# Streamed bodies arrive in small pieces; coalesce before forwarding to the spool
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def _reuse_prior_import(digest: str, record: Dict[str, Any]) -> JSONResponse:
+    """Answer an upload with the import already registered for its content hash."""
+    task_id = record["task_id"]
+    result = record.get("result") or {}
+    if record.get("status") == "completed" and get_progress(task_id) is None:
+        # Progress expires sooner than the dedup window; re-seed it so clients
+        # following the task (SSE, polling) see the finished state.
+        set_progress(task_id, {
+            "status": "completed",
+            "stage": "completed",
+            "processed": result.get("processed", 0),
+            "total": result.get("processed", 0),
+            "errors": result.get("errors", 0),
+            "message": "Identical file already imported",
+        })
+    return JSONResponse({
+        "task_id": task_id,
+        "deduplicated": True,
+        "content_hash": digest,
+        "status": record.get("status"),
+        "result": record.get("result"),
+        "completed_at": record.get("completed_at"),
+    })
+
 
 @router.post("/csv")
-async def upload_csv(file: UploadFile = File(...)) -> JSONResponse:
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Please upload a .csv file")
-    
-    # Enforce max file size (200MB for ~500k rows; adjust as needed)
-    MAX_SIZE = 200 * 1024 * 1024  # 200MB
+async def upload_csv(
+    file: UploadFile = File(...),
+    force: bool = Query(default=False),
+    dry_run: bool = Query(default=False),
+) -> JSONResponse:
+    """Upload a CSV (optionally compressed) and enqueue its import.
+
+    A byte-identical file uploaded within UPLOAD_DEDUP_WINDOW_S returns the prior
+    import's task (finished or still running) instead of importing again, unless
+    `force=true`. With `dry_run=true` the file is validated and classified
+    (would insert/update/leave unchanged/reject) without writing; dry runs are
+    never deduplicated since the catalog they compare against keeps changing.
+    """
+    suffix = upload_suffix(file.filename or "")
+    if not suffix:
+        raise HTTPException(status_code=400, detail=f"Please upload one of: {', '.join(SUPPORTED_SUFFIXES)}")
+
     file_size = 0
+    hasher = hashlib.sha256()
 
-    # Save to a temporary file
-    suffix = os.path.splitext(file.filename)[1]
+    # Save to a temporary file, kept compressed; the worker decompresses while reading
     fd, temp_path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
     os.close(fd)
 
@@ -39,6 +99,7 @@ async def upload_csv(file: UploadFile = File(...)) -> JSONResponse:
                 file_size += len(chunk)
                 if file_size > MAX_SIZE:
                     raise HTTPException(status_code=413, detail=f"File too large. Max size: {MAX_SIZE // (1024*1024)}MB")
+                hasher.update(chunk)
                 out.write(chunk)
     except HTTPException:
         # Clean up temp file on size limit error
@@ -50,10 +111,86 @@ async def upload_csv(file: UploadFile = File(...)) -> JSONResponse:
     finally:
         await file.close()
 
+    digest = hasher.hexdigest()
+    dedup = settings.upload_dedup_window_s > 0 and not dry_run
+    task_id = str(uuid.uuid4())
+    if dedup:
+        if not force:
+            prior = get_import_record(digest)
+            if prior:
+                os.remove(temp_path)
+                return _reuse_prior_import(digest, prior)
+        claim = {"task_id": task_id, "status": "queued", "queued_at": datetime.utcnow().isoformat()}
+        if not claim_import_hash(digest, claim, ttl=settings.upload_dedup_inflight_ttl_s, force=force):
+            # Lost a race with a concurrent upload of the same bytes
+            prior = get_import_record(digest)
+            if prior:
+                os.remove(temp_path)
+                return _reuse_prior_import(digest, prior)
+
     # Enqueue Celery task
-    task = celery_app.send_task("import_csv", args=[temp_path])
+    try:
+        task = send_task(
+            "import_csv",
+            args=[temp_path],
+            kwargs={"content_hash": digest if dedup else None, "dry_run": dry_run},
+            task_id=task_id,
+        )
+    except Exception as e:
+        # No task will ever run: free the hash so a retry isn't answered with
+        # this never-queued import, and drop the file nobody will read
+        if dedup:
+            release_import_hash(digest, task_id)
+        try:
+            os.remove(temp_path)
+        except Exception:
+            pass
+        raise HTTPException(status_code=503, detail="Could not queue the import; try again") from e
+
+    return JSONResponse({"task_id": task.id, "deduplicated": False, "content_hash": digest, "dry_run": dry_run})
+
 
-    return JSONResponse({"task_id": task.id})
+@router.post("/csv/stream")
+async def upload_csv_stream(request: Request, filename: str = "upload.csv", dry_run: bool = False) -> JSONResponse:
+    """Pipelined ingest: the raw request body (Content-Type: text/csv) is forwarded to a
+    spool while the import task is already consuming it, so import overlaps the upload.
+    """
+    suffix = upload_suffix(filename)
+    if suffix not in STREAMABLE_SUFFIXES:
+        raise HTTPException(status_code=400, detail=f"Streaming upload must be one of: {', '.join(STREAMABLE_SUFFIXES)}")
+
+    spool_id = new_spool_id()
+    spool = open_spool(spool_id)
+    # Enqueue first so the worker starts parsing as soon as the first records land
+    task = send_task("import_csv", args=[spool_source(spool_id, suffix)], kwargs={"dry_run": dry_run})
+
+    file_size = 0
+    pending = bytearray()
+    try:
+        async for chunk in request.stream():
+            file_size += len(chunk)
+            if file_size > MAX_SIZE:
+                raise HTTPException(status_code=413, detail=f"File too large. Max size: {MAX_SIZE // (1024*1024)}MB")
+            pending += chunk
+            if len(pending) >= SPOOL_CHUNK_SIZE:
+                await run_in_threadpool(spool.write, bytes(pending))
+                pending.clear()
+        if pending:
+            await run_in_threadpool(spool.write, bytes(pending))
+        await run_in_threadpool(spool.finish)
+    except HTTPException as e:
+        await run_in_threadpool(spool.abort, str(e.detail))
+        raise
+    except ClientDisconnect:
+        await run_in_threadpool(spool.abort, "Client disconnected during upload")
+        raise HTTPException(status_code=400, detail="Upload interrupted")
+    except TimeoutError:
+        # spool.write waits while the worker is SPOOL_MAX_PENDING_CHUNKS behind;
+        # it never caught up (or never started)
+        await run_in_threadpool(spool.abort, "Import did not keep up with the upload")
+        raise HTTPException(status_code=503, detail="Import is not consuming the upload; try again later")
+
+    return JSONResponse({"task_id": task.id, "bytes": file_size})
 
 
 @router.get("/progress/{task_id}")
@@ -83,7 +220,55 @@ async def progress_stream(task_id: str) -> EventSourceResponse:
 
 @router.get("/errors/{task_id}")
 async def import_errors(task_id: str, limit: int = 100) -> JSONResponse:
-    """Return up to `limit` recent CSV row errors and the total error count for the task."""
+    """Return up to `limit` sampled CSV row errors and the total error count for the task.
+
+    Only the first IMPORT_ERROR_SAMPLE_SIZE errors are kept in Redis; the full
+    set is at /uploads/errors/{task_id}/report.
+    """
     errs = get_errors(task_id, limit=limit)
-    count = get_errors_count(task_id)
-    return JSONResponse({"count": count, "items": errs})
+    count = (get_progress(task_id) or {}).get("errors")
+    if count is None:
+        count = get_errors_count(task_id)
+    return JSONResponse({
+        "count": count,
+        "items": errs,
+        "report_url": f"/uploads/errors/{task_id}/report",
+    })
+
+
+@router.get("/errors/{task_id}/report")
+def import_error_report(
+    task_id: str,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+) -> StreamingResponse:
+    """Stream the full error report (row, error, raw record) as NDJSON or CSV.
+
+    Page with `offset`/`limit`; `X-Total-Count` is the number of errors written
+    so far (it grows while the import runs) and `X-Next-Offset` is where the
+    next page starts.
+    """
+    total = report_total(task_id)
+    if total is None:
+        raise HTTPException(status_code=404, detail="No error report for this task")
+    end = total if limit is None else min(total, offset + limit)
+    records = iter_report(task_id, offset=offset, limit=max(end - offset, 0))
+    if format == "csv":
+        body, media_type = render_csv(records), "text/csv"
+    else:
+        body, media_type = render_ndjson(records), "application/x-ndjson"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{task_id}-errors.{format}"',
+        "X-Total-Count": str(total),
+        "X-Next-Offset": str(max(end, offset)),
+    }
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/warnings/{task_id}")
+async def import_warnings(task_id: str, limit: int = 100) -> JSONResponse:
+    """Return up to `limit` recent CSV row warnings (e.g. duplicate SKUs collapsed last-wins)."""
+    warnings = get_warnings(task_id, limit=limit)
+    count = (get_progress(task_id) or {}).get("duplicates", len(warnings))
+    return JSONResponse({"count": count, "items": warnings})
@@ -6,10 +6,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.models import Webhook
+from app.producer import send_task
 from app.schemas import WebhookCreate, WebhookUpdate, WebhookOut
-from app.celery_app import celery_app
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 def list_webhooks(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = select(Webhook).order_by(Webhook.id.desc())
     query = query.offset((page - 1) * page_size).limit(page_size)
@@ -71,5 +71,5 @@ def test_webhook(webhook_id: int, db: Session = Depends(get_db)):
     if not wh:
         raise HTTPException(status_code=404, detail="Webhook not found")
     payload = {"event": wh.event_type, "test": True, "timestamp": "now"}
-    task = celery_app.send_task("send_webhook", args=[webhook_id, wh.event_type, payload])
+    task = send_task("send_webhook", args=[webhook_id, wh.event_type, payload])
     return {"task_id": task.id}
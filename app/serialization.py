@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+from .models import Product
+
+# Columns of ProductOut, in its JSON field order
+PRODUCT_COLUMNS = (
+    Product.sku,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.active,
+    Product.id,
+    Product.created_at,
+    Product.updated_at,
+)
+_PRODUCT_KEYS = tuple(col.key for col in PRODUCT_COLUMNS)
+
+
+def _default(obj: Any) -> Any:
+    # Numeric(12, 2) comes back as Decimal; ProductOut exposes price as a float
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def product_row(row: Sequence[Any]) -> Dict[str, Any]:
+    """Map a row selected with PRODUCT_COLUMNS to the ProductOut JSON shape."""
+    return dict(zip(_PRODUCT_KEYS, row))
+
+
+def dumps(content: Any) -> bytes:
+    """orjson-encode a payload already in its final JSON shape."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(Response):
+    """orjson-encoded response for payloads already in their final JSON shape.
+
+    Skips pydantic validation and jsonable_encoder; datetimes are encoded like
+    pydantic does (ISO 8601, "Z" for UTC).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import time
+import uuid
+from typing import Optional
+
+from .config import settings
+from .utils import get_redis_binary_client
+
+# Source strings passed to import_csv that refer to a spool rather than a file path
+SPOOL_PREFIX = "spool://"
+
+
+class SpoolAborted(Exception):
+    """Raised on the reading side when the uploader gave up mid-stream."""
+
+
+def _wait_for_reader(behind, what: str) -> None:
+    """Backpressure for writers: block while `behind()` is true, up to the idle timeout."""
+    deadline = time.monotonic() + settings.spool_idle_timeout_s
+    while behind():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{what} not consumed for {settings.spool_idle_timeout_s:.0f}s")
+        time.sleep(0.05)
+
+
+def new_spool_id() -> str:
+    return uuid.uuid4().hex
+
+
+def spool_source(spool_id: str, suffix: str = ".csv") -> str:
+    # The suffix carries the upload's compression format through to the worker
+    return f"{SPOOL_PREFIX}{spool_id}{suffix}"
+
+
+def is_spool_source(source: str) -> bool:
+    return source.startswith(SPOOL_PREFIX)
+
+
+def spool_id_of(source: str) -> str:
+    return source[len(SPOOL_PREFIX):].split(".", 1)[0]
+
+
+class RedisSpool:
+    """Upload chunks carried over a Redis stream; consumed entries are trimmed.
+
+    The reader trims up to the entry it last read, so the stream length is the
+    number of unread chunks plus one; writes wait while it exceeds the limit.
+    """
+
+    def __init__(self, spool_id: str) -> None:
+        self.key = f"spool:{spool_id}"
+        self._last_id = "0-0"
+        self._r = get_redis_binary_client()
+
+    def _append(self, fields) -> int:
+        pipe = self._r.pipeline(transaction=False)
+        pipe.xadd(self.key, fields)
+        pipe.expire(self.key, settings.spool_ttl_s)
+        pipe.xlen(self.key)
+        return pipe.execute()[-1]
+
+    def write(self, chunk: bytes) -> None:
+        length = self._append({b"d": chunk})
+        limit = settings.spool_max_pending_chunks
+        if limit and length > limit + 1:
+            _wait_for_reader(lambda: self._r.xlen(self.key) > limit + 1, "Upload spool")
+
+    def finish(self) -> None:
+        self._append({b"eof": b"1"})
+
+    def abort(self, reason: str) -> None:
+        self._append({b"abort": reason.encode("utf-8")})
+
+    def next_chunk(self, timeout_s: float) -> Optional[bytes]:
+        """Return the next chunk, b"" at end of stream; raise on abort or timeout."""
+        resp = self._r.xread({self.key: self._last_id}, count=1, block=int(timeout_s * 1000))
+        if not resp:
+            raise TimeoutError(f"No upload data received for {timeout_s:.0f}s")
+        _, entries = resp[0]
+        entry_id, fields = entries[0]
+        self._last_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        # Free memory for consumed entries as we go
+        self._r.xtrim(self.key, minid=self._last_id)
+        if b"abort" in fields:
+            raise SpoolAborted(fields[b"abort"].decode("utf-8", "replace"))
+        if b"eof" in fields:
+            return b""
+        return fields[b"d"]
+
+    def delete(self) -> None:
+        self._r.delete(self.key)
+
+
+class LocalSpool:
+    """Numbered chunk files in a shared directory; a local-disk stand-in for Redis."""
+
+    def __init__(self, spool_id: str) -> None:
+        self.dir = os.path.join(settings.spool_dir, spool_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self._write_seq = 0
+        self._read_seq = 0
+
+    def _chunk_path(self, seq: int) -> str:
+        return os.path.join(self.dir, f"{seq:08d}.chunk")
+
+    def _marker(self, name: str, content: bytes = b"") -> None:
+        tmp = os.path.join(self.dir, f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, os.path.join(self.dir, name))
+
+    def write(self, chunk: bytes) -> None:
+        # Chunks are consumed (deleted) in order, so the reader is too far behind
+        # while the chunk spool_max_pending_chunks back is still there
+        limit = settings.spool_max_pending_chunks
+        if limit and self._write_seq >= limit:
+            oldest = self._chunk_path(self._write_seq - limit + 1)
+            _wait_for_reader(lambda: os.path.exists(oldest), "Upload spool")
+        # Write then rename so readers never observe a partial chunk
+        self._write_seq += 1
+        tmp = os.path.join(self.dir, f".{self._write_seq:08d}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(chunk)
+        os.replace(tmp, self._chunk_path(self._write_seq))
+
+    def finish(self) -> None:
+        self._marker("EOF", str(self._write_seq).encode())
+
+    def abort(self, reason: str) -> None:
+        self._marker("ABORT", reason.encode("utf-8"))
+
+    def next_chunk(self, timeout_s: float) -> Optional[bytes]:
+        deadline = time.monotonic() + timeout_s
+        nxt = self._chunk_path(self._read_seq + 1)
+        while True:
+            if os.path.exists(nxt):
+                with open(nxt, "rb") as f:
+                    data = f.read()
+                os.remove(nxt)
+                self._read_seq += 1
+                return data
+            abort_path = os.path.join(self.dir, "ABORT")
+            if os.path.exists(abort_path):
+                with open(abort_path, "rb") as f:
+                    raise SpoolAborted(f.read().decode("utf-8", "replace"))
+            eof_path = os.path.join(self.dir, "EOF")
+            if os.path.exists(eof_path):
+                with open(eof_path, "rb") as f:
+                    last = int(f.read() or 0)
+                if self._read_seq >= last:
+                    return b""
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No upload data received for {timeout_s:.0f}s")
+            time.sleep(0.05)
+
+    def delete(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prune_local_spools() -> int:
+    """Remove local spool directories untouched for spool_ttl_s (e.g. never picked up).
+
+    The Redis backend gets the same through key expiry. Returns the number removed.
+    """
+    cutoff = time.time() - settings.spool_ttl_s
+    removed = 0
+    try:
+        entries = list(os.scandir(settings.spool_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            stale = entry.is_dir() and entry.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def open_spool(spool_id: str):
+    if settings.spool_backend == "local":
+        return LocalSpool(spool_id)
+    return RedisSpool(spool_id)
+
+
+class SpoolReader(io.RawIOBase):
+    """Blocking binary reader over a spool, for wrapping in io.TextIOWrapper."""
+
+    def __init__(self, spool, idle_timeout_s: Optional[float] = None) -> None:
+        self._spool = spool
+        self._timeout = idle_timeout_s if idle_timeout_s is not None else settings.spool_idle_timeout_s
+        self._buf = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and not self._eof:
+            chunk = self._spool.next_chunk(self._timeout)
+            if not chunk:
+                self._eof = True
+            self._buf = chunk or b""
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
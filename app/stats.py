@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .utils import get_last_import
+
+# Counter shards per key; must match STATS_SLOTS in migration 20261019_0003
+STATS_SLOTS = 16
+
+# Price bucket labels in display order; must match product_price_bucket() in SQL
+PRICE_BUCKETS = ("0-10", "10-25", "25-50", "50-100", "100-250", "250-500", "500-1000", "1000+", "none")
+
+# Shards are summed on read: at most STATS_SLOTS rows per key, regardless of catalog size
+READ_STATS_SQL = text("SELECT key, sum(value) FROM product_stats GROUP BY key")
+
+LAST_CHANGE_SQL = text(
+    """
+    SELECT greatest(
+        (SELECT changed_at FROM products WHERE change_seq IS NOT NULL ORDER BY change_seq DESC LIMIT 1),
+        (SELECT changed_at FROM product_tombstones WHERE op <> 'horizon' ORDER BY change_seq DESC LIMIT 1)
+    )
+    """
+)
+
+# Same key expansion as the maintenance triggers, over the whole table
+FULL_STATS_SQL = text(
+    """
+    SELECT kv.key, sum(kv.value)
+    FROM products r
+    CROSS JOIN LATERAL (VALUES
+        ('total', 1::numeric),
+        ('active', CASE WHEN r.active THEN 1 ELSE 0 END::numeric),
+        ('price_sum', coalesce(r.price, 0)),
+        ('priced', CASE WHEN r.price IS NULL THEN 0 ELSE 1 END::numeric),
+        ('bucket:' || product_price_bucket(r.price), 1::numeric)
+    ) AS kv(key, value)
+    GROUP BY kv.key
+    """
+)
+
+
+def read_stats(db: Session) -> Dict[str, Any]:
+    """Catalog aggregates from the maintained counters (no scan of products)."""
+    counters: Dict[str, Decimal] = {key: value for key, value in db.execute(READ_STATS_SQL)}
+    total = int(counters.get("total", 0))
+    active = int(counters.get("active", 0))
+    priced = int(counters.get("priced", 0))
+    price_sum = counters.get("price_sum", Decimal(0))
+    return {
+        "total": total,
+        "active": active,
+        "inactive": total - active,
+        "price": {
+            "priced": priced,
+            "sum": price_sum,
+            "avg": round(price_sum / priced, 2) if priced else None,
+            "buckets": {label: int(counters.get(f"bucket:{label}", 0)) for label in PRICE_BUCKETS},
+        },
+        "last_change_at": db.execute(LAST_CHANGE_SQL).scalar(),
+        "last_import": get_last_import(),
+    }
+
+
+LAST_TRUNCATE_SQL = text("SELECT max(change_seq) FROM product_tombstones WHERE op = 'truncate'")
+
+APPLY_DRIFT_SQL = text(
+    """
+    INSERT INTO product_stats (slot, key, value) VALUES (0, :key, :delta)
+    ON CONFLICT (slot, key) DO UPDATE SET value = product_stats.value + EXCLUDED.value
+    """
+)
+
+
+def reconcile_stats(db: Session) -> Optional[Dict[str, Any]]:
+    """Recount products and correct the counters by the drift; returns per-key drift.
+
+    Counters and the recount are read in one REPEATABLE READ snapshot, without
+    locks: triggers update the counters in the same transaction as the rows, so
+    within a snapshot any difference is drift. Writes committed after the
+    snapshot have already merged their own deltas, so the drift is applied as a
+    delta in a second, short transaction. Returns None (nothing applied) if the
+    counters couldn't be locked within STATS_RECONCILE_LOCK_TIMEOUT_MS or the
+    table was truncated in between; the next run corrects it.
+    """
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    current: Dict[str, Decimal] = {key: value for key, value in db.execute(READ_STATS_SQL)}
+    actual: Dict[str, Decimal] = {key: value for key, value in db.execute(FULL_STATS_SQL)}
+    truncated_at = db.execute(LAST_TRUNCATE_SQL).scalar()
+    db.commit()
+
+    drift = {
+        key: actual.get(key, 0) - current.get(key, 0)
+        for key in set(current) | set(actual)
+        if actual.get(key, 0) != current.get(key, 0)
+    }
+    if not drift:
+        return {}
+
+    try:
+        db.execute(
+            text("SELECT set_config('lock_timeout', :timeout, true)"),
+            {"timeout": f"{settings.stats_reconcile_lock_timeout_ms}ms"},
+        )
+        # TRUNCATE resets the counters; a drift measured before it no longer applies
+        if db.execute(LAST_TRUNCATE_SQL).scalar() != truncated_at:
+            db.rollback()
+            return None
+        db.execute(APPLY_DRIFT_SQL, [{"key": key, "delta": drift[key]} for key in sorted(drift)])
+        db.commit()
+    except OperationalError:
+        db.rollback()
+        return None
+    return {key: float(value) for key, value in drift.items()}
@@ -1,72 +1,209 @@
 from __future__ import annotations
 
 import csv
+import io
+import json
 import logging
 import os
 import time
+import zlib
 from datetime import datetime
-from typing import List, Dict, Any
+from decimal import Decimal
+from typing import List, Dict, Any, Optional
 
 import httpx
-from sqlalchemy import text
+from sqlalchemy import text, update
+from sqlalchemy.exc import OperationalError
 
 logger = logging.getLogger(__name__)
 
 from .celery_app import celery_app
-from .db import engine, get_session
+from .config import settings
+from .db import get_engine, get_replica_engine, get_session, replica_monitor
+from .batching import AdaptiveBatchSizer
+from .compression import open_decompressed, upload_suffix
+from .dedup import DuplicateTracker
+from .error_report import ErrorReportWriter, prune_reports
+from .metrics import (
+    IMPORT_BATCH_COMMIT_SECONDS,
+    IMPORT_BATCH_ROWS,
+    IMPORT_ROWS_PER_SECOND,
+    IMPORT_ROWS_TOTAL,
+    IMPORTS_TOTAL,
+    WEBHOOK_DELIVERIES_TOTAL,
+    WEBHOOK_DELIVERY_SECONDS,
+    StageTimer,
+)
 from .models import Webhook
-from .utils import init_progress, update_progress, push_error, get_redis_client, is_rate_limited
+from .webhooks_service import enqueue_event
+from .spool import SpoolReader, is_spool_source, open_spool, prune_local_spools, spool_id_of
+from .stats import reconcile_stats
+from .utils import (
+    init_progress,
+    update_progress,
+    push_error,
+    push_warnings,
+    get_redis_client,
+    is_rate_limited,
+    record_import_result,
+    release_import_hash,
+    clear_import_hashes,
+    bump_catalog_version,
+    set_last_import,
+)
 
 
-BATCH_SIZE = 5000
+
+def _open_source(file_path: str):
+    """Open an import source as text: a local file or a streaming upload spool.
+
+    Compressed uploads (.csv.gz, .csv.zst, .zip) are decompressed on the fly.
+    """
+    if is_spool_source(file_path):
+        raw = io.BufferedReader(SpoolReader(open_spool(spool_id_of(file_path))))
+    else:
+        raw = open(file_path, "rb")
+    binary = open_decompressed(raw, upload_suffix(file_path))
+    return io.TextIOWrapper(binary, encoding="utf-8", newline="")
+
+
+def _cleanup_source(file_path: str) -> None:
+    if is_spool_source(file_path):
+        open_spool(spool_id_of(file_path)).delete()
+    else:
+        os.remove(file_path)
 
 
 @celery_app.task(name="import_csv")
-def import_csv(file_path: str) -> Dict[str, Any]:
+def import_csv(file_path: str, content_hash: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Import a CSV of products, or with `dry_run` only classify what it would do.
+
+    A dry run parses and validates every row as usual but, instead of upserting,
+    looks each batch's SKUs up by sku_ci (on the replica when usable) and counts
+    rows that would be inserted, updated or left unchanged. Nothing is written.
+    """
     task_id = import_csv.request.id  # type: ignore[attr-defined]
-    logger.info(f"Starting CSV import task {task_id} for file {file_path}")
+    logger.info(f"Starting CSV {'dry run' if dry_run else 'import'} task {task_id} for file {file_path}")
+    streaming = is_spool_source(file_path)
+    import_started = time.perf_counter()
+    timer = StageTimer()
     # Count total logical CSV records (excluding header) for an accurate progress bar.
     # Use csv.reader so embedded newlines in quoted fields do not inflate the count.
+    # A streaming upload is still arriving, so its total is only known at the end.
     total_rows = 0
-    try:
-        with open(file_path, "r", newline="", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            # Skip header row (if present)
-            _ = next(reader, None)
-            for rec in reader:
-                # Skip completely blank records
-                if not rec or all((str(c).strip() == "" for c in rec)):
-                    continue
-                total_rows += 1
-    except Exception as e:
-        logger.warning(f"Failed to count rows for task {task_id}: {e}")
-        total_rows = 0
+    if not streaming:
+        count_started = time.perf_counter()
+        try:
+            with _open_source(file_path) as f:
+                reader = csv.reader(f)
+                # Skip header row (if present)
+                _ = next(reader, None)
+                for rec in reader:
+                    # Skip completely blank records
+                    if not rec or all((str(c).strip() == "" for c in rec)):
+                        continue
+                    total_rows += 1
+        except Exception as e:
+            logger.warning(f"Failed to count rows for task {task_id}: {e}")
+            total_rows = 0
+        timer.add("count", time.perf_counter() - count_started)
 
     init_progress(task_id, total=total_rows)
     update_progress(task_id, status="running", stage="importing", message="Importing in batches")
 
-    insert_sql = text(
-        """
-        INSERT INTO products (sku, name, description, price, active, created_at, updated_at)
-        VALUES (:sku, :name, :description, :price, true, now(), now())
-        ON CONFLICT ON CONSTRAINT uq_products_sku_ci
-        DO UPDATE SET
-            name = EXCLUDED.name,
-            description = EXCLUDED.description,
-            price = EXCLUDED.price,
-            updated_at = now()
-        """
-    )
-
     processed = 0
     errors = 0
+    duplicates = 0
+    # Rows are collapsed on lower(sku) (last wins) so one upsert statement never
+    # touches the same row twice; the tracker reports duplicates across batches.
+    tracker = DuplicateTracker(
+        max_in_memory=settings.import_dedup_memory_keys,
+        partitions=settings.import_dedup_partitions,
+    )
+
+    # Batch size adapts to measured commit latency; see AdaptiveBatchSizer.
+    sizer = AdaptiveBatchSizer(
+        initial=settings.import_batch_size,
+        minimum=settings.import_batch_min,
+        maximum=settings.import_batch_max,
+        target_ms=settings.import_batch_target_ms,
+        max_bytes=settings.import_batch_max_bytes,
+    )
+    batch: Dict[str, Dict[str, Any]] = {}
+    batch_bytes = 0
+    lock_retries = 0
+    # Every row error goes to the on-disk report; Redis keeps a sample. Opened
+    # inside the try below, so a failure to create it still fails the import
+    # cleanly (progress marked failed, content hash released).
+    report: Optional[ErrorReportWriter] = None
+    # Dry run: outcome counts, and each SKU's outcome so a SKU repeated in a
+    # later batch replaces its earlier classification instead of adding to it
+    would: Dict[str, int] = {"insert": 0, "update": 0, "unchanged": 0}
+    outcomes: Dict[str, str] = {}
+
+    def flush() -> None:
+        nonlocal processed, batch_bytes, lock_retries
+        # Upsert in lower(sku) order so concurrent imports over overlapping SKUs
+        # take row locks in the same order. Each batch is a single statement, so
+        # its product_stats slot is locked once, last, after every row lock;
+        # that only stays deadlock-free while all writers to products use one
+        # statement per transaction (see README, Concurrent imports).
+        keys = sorted(batch)
+        rows = [batch[key] for key in keys]
+        if dry_run:
+            elapsed, retries = _classify_batch(rows, keys, outcomes, would), 0
+        else:
+            elapsed, retries = _execute_batch(rows, keys)
+            bump_catalog_version()
+            IMPORT_BATCH_COMMIT_SECONDS.observe(elapsed)
+        timer.add("db", elapsed)
+        IMPORT_BATCH_ROWS.observe(len(rows))
+        lock_retries += retries
+        processed += len(rows)
+        sizer.record(len(rows), batch_bytes, elapsed)
+        batch.clear()
+        batch_bytes = 0
+        with timer.stage("errors"):
+            # Make errors so far downloadable while the import is still running
+            report.flush()
+        flush_warnings()
+        with timer.stage("progress"):
+            update_progress(
+                task_id, processed=processed, errors=errors, duplicates=duplicates, batching=sizer.snapshot(),
+                **({"would": dict(would)} if dry_run else {}),
+            )
+
+    # Like errors, Redis keeps only a sample of duplicate warnings (the count is in
+    # progress), buffered and pushed once per batch
+    pending_warnings: List[Dict[str, Any]] = []
+
+    def report_duplicate(key: str, superseded_row: int, winning_row: int) -> None:
+        if duplicates <= settings.import_warning_sample_size:
+            pending_warnings.append({
+                "row": superseded_row,
+                "warning": f"Duplicate SKU superseded by row {winning_row}",
+                "sku": key,
+                "superseded_by": winning_row,
+            })
+
+    def flush_warnings() -> None:
+        if pending_warnings:
+            with timer.stage("errors"):
+                push_warnings(task_id, pending_warnings, max_warnings=settings.import_warning_sample_size)
+            pending_warnings.clear()
 
     try:
-        with open(file_path, "r", newline="", encoding="utf-8") as f:
+        report = ErrorReportWriter(task_id)
+        with _open_source(file_path) as f:
             reader = csv.DictReader(f)
-            batch: List[Dict[str, Any]] = []
             data_row_number = 0
+            # Time spent inside the reader's iteration is CSV parsing; the loop
+            # body is validation, minus Redis error/warning pushes timed separately.
+            mark = time.perf_counter()
             for row in reader:
+                row_started = time.perf_counter()
+                timer.add("parse", row_started - mark)
+                redis_before = timer.totals.get("errors", 0.0)
                 data_row_number += 1
                 try:
                     sku = (row.get("sku") or "").strip()
@@ -78,100 +215,449 @@ def import_csv(file_path: str) -> Dict[str, Any]:
                     if not sku or not name:
                         raise ValueError("Missing sku or name")
 
-                    batch.append({
+                    key = sku.lower()
+                    superseded = tracker.add(key, data_row_number)
+                    if superseded is not None:
+                        duplicates += 1
+                        report_duplicate(key, superseded, data_row_number)
+                    batch[key] = {
                         "sku": sku,
                         "name": name,
                         "description": description,
                         "price": price,
-                    })
+                    }
+                    batch_bytes += len(sku) + len(name) + len(description or "") + 16
                 except Exception as e:
                     errors += 1
-                    # store a bounded set of error details in Redis
-                    push_error(task_id, {
-                        "row": data_row_number,
-                        "error": str(e),
-                        "data": {k: row.get(k) for k in ("sku", "name", "description", "price")},
-                    })
-                
-                if len(batch) >= BATCH_SIZE:
-                    _execute_batch(insert_sql, batch)
-                    processed += len(batch)
-                    batch.clear()
-                    update_progress(task_id, processed=processed, errors=errors)
+                    with timer.stage("errors"):
+                        # Full raw record; columns beyond the header land under None
+                        data = {k if k is not None else "_extra": v for k, v in row.items()}
+                        error = {"row": data_row_number, "error": str(e), "data": data}
+                        report.append(error)
+                        if errors <= settings.import_error_sample_size:
+                            push_error(task_id, error, max_errors=settings.import_error_sample_size)
+                timer.add("validate", time.perf_counter() - row_started - (timer.totals.get("errors", 0.0) - redis_before))
+
+                if len(batch) >= sizer.size or batch_bytes >= sizer.max_bytes:
+                    flush()
+                mark = time.perf_counter()
 
             if batch:
-                _execute_batch(insert_sql, batch)
-                processed += len(batch)
-                update_progress(task_id, processed=processed, errors=errors)
+                flush()
+            report.close()
+
+        # Duplicates spread across batches of a file too large to track in memory
+        for key, superseded_row, winning_row in tracker.finalize():
+            duplicates += 1
+            report_duplicate(key, superseded_row, winning_row)
+        flush_warnings()
+
+        stage_seconds = timer.observe()
+        elapsed_total = time.perf_counter() - import_started
+        rows_per_sec = processed / elapsed_total if elapsed_total > 0 else 0.0
+        IMPORT_ROWS_PER_SECOND.observe(rows_per_sec)
+        IMPORT_ROWS_TOTAL.labels("processed").inc(processed)
+        IMPORT_ROWS_TOTAL.labels("error").inc(errors)
+        IMPORT_ROWS_TOTAL.labels("duplicate").inc(duplicates)
+        IMPORTS_TOTAL.labels("dry_run" if dry_run else "completed").inc()
 
+        dry_run_fields = {"dry_run": True, "would": dict(would), "rejected": errors} if dry_run else {}
         # Set final total = processed for UI progress bar completion
-        update_progress(task_id, status="completed", stage="completed", total=processed, message="Import complete")
-        logger.info(f"CSV import {task_id} completed: {processed} processed, {errors} errors")
-        return {"status": "completed", "processed": processed, "errors": errors}
+        update_progress(
+            task_id, status="completed", stage="completed", total=processed,
+            duplicates=duplicates, batching=sizer.snapshot(), stage_seconds=stage_seconds,
+            message="Dry run complete" if dry_run else "Import complete",
+            **dry_run_fields,
+        )
+        logger.info(
+            f"CSV {'dry run' if dry_run else 'import'} {task_id} completed: {processed} processed, {errors} errors, "
+            f"{duplicates} duplicates ({rows_per_sec:.0f} rows/s, stages {stage_seconds})"
+            + (f", would {would}" if dry_run else "")
+        )
+        result = {
+            "status": "completed",
+            **dry_run_fields,
+            "processed": processed,
+            "errors": errors,
+            "duplicates": duplicates,
+            "batching": sizer.snapshot(),
+            "lock_retries": lock_retries,
+            "rows_per_sec": round(rows_per_sec, 1),
+            "stage_seconds": stage_seconds,
+        }
+        if dry_run:
+            return result
+        set_last_import({
+            "task_id": task_id,
+            "processed": processed,
+            "errors": errors,
+            "completed_at": datetime.utcnow().isoformat(),
+        })
+        if content_hash and settings.upload_dedup_window_s > 0:
+            # Let byte-identical uploads within the window reuse this result
+            record_import_result(content_hash, {
+                "task_id": task_id,
+                "status": "completed",
+                "result": result,
+                "completed_at": datetime.utcnow().isoformat(),
+            }, ttl=settings.upload_dedup_window_s)
+        return result
     except Exception as e:
         logger.error(f"CSV import {task_id} failed: {e}", exc_info=True)
+        timer.observe()
+        IMPORTS_TOTAL.labels("failed").inc()
         update_progress(task_id, status="failed", stage="importing", message=str(e))
+        if content_hash:
+            # A failed import must not short-circuit a retry of the same file
+            release_import_hash(content_hash, task_id)
         return {"status": "failed", "reason": str(e)}
     finally:
+        tracker.close()
         try:
-            os.remove(file_path)
+            if report is not None:
+                report.close()
+        except Exception:
+            logger.warning(f"Failed to write error report for task {task_id}", exc_info=True)
+        try:
+            _cleanup_source(file_path)
         except Exception:
             pass
 
 
-def _execute_batch(insert_sql, batch: List[Dict[str, Any]]):
-    # Use a single transaction per batch for speed
-    with engine.begin() as conn:
-        conn.execute(insert_sql, batch)
+# Namespace for pg_advisory_xact_lock(int, int) so import locks never collide with other users
+IMPORT_LOCK_NAMESPACE = 0x5C0
+# SQLSTATEs worth retrying a batch for: deadlock_detected, serialization_failure
+RETRYABLE_PGCODES = {"40P01", "40001"}
+
+advisory_lock_sql = text(
+    """
+    SELECT pg_advisory_xact_lock(:ns, b)
+    FROM (SELECT b FROM unnest(CAST(:buckets AS integer[])) AS b ORDER BY b) AS ordered
+    """
+)
+
+
+def _lock_buckets(keys: List[str]) -> List[int]:
+    """Map SKU keys onto the advisory-lock bucket ids covering them."""
+    n = settings.import_lock_buckets
+    return sorted({zlib.crc32(k.encode("utf-8")) % n for k in keys})
+
+
+# One statement per batch: rows travel as arrays and are unnested in order (the
+# caller sorts them by lower(sku)). Passing a list of parameter sets to a text()
+# statement would run it once per row, firing the statement-level stats
+# triggers per row and interleaving product_stats slot locks with product row
+# locks; as one statement the batch takes all its product row locks in key
+# order and then merges its stats delta once.
+upsert_batch_sql = text(
+    """
+    INSERT INTO products (sku, name, description, price, active, created_at, updated_at)
+    SELECT t.sku, t.name, t.description, t.price, true, now(), now()
+    FROM unnest(
+        CAST(:skus AS text[]), CAST(:names AS text[]), CAST(:descriptions AS text[]), CAST(:prices AS numeric[])
+    ) WITH ORDINALITY AS t(sku, name, description, price, ord)
+    ORDER BY t.ord
+    ON CONFLICT ON CONSTRAINT uq_products_sku_ci
+    DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        price = EXCLUDED.price,
+        updated_at = now()
+    """
+)
+
+
+def _batch_params(batch: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    return {
+        "skus": [r["sku"] for r in batch],
+        "names": [r["name"] for r in batch],
+        "descriptions": [r["description"] for r in batch],
+        "prices": [r["price"] for r in batch],
+    }
+
+
+def _execute_batch(batch: List[Dict[str, Any]], keys: List[str]) -> tuple[float, int]:
+    """Upsert one batch in a single transaction, as a single statement.
+
+    Returns (wall time in seconds, number of deadlock/serialization retries).
+    When IMPORT_LOCK_BUCKETS is set, the transaction first takes advisory locks on
+    the SKU hash buckets it touches, in ascending order, serializing imports whose
+    batches overlap while disjoint ones proceed in parallel.
+    """
+    start = time.perf_counter()
+    retries = 0
+    params = _batch_params(batch)
+    while True:
+        try:
+            with get_engine().begin() as conn:
+                if settings.import_lock_buckets > 0:
+                    conn.execute(advisory_lock_sql, {"ns": IMPORT_LOCK_NAMESPACE, "buckets": _lock_buckets(keys)})
+                conn.execute(upsert_batch_sql, params)
+            return time.perf_counter() - start, retries
+        except OperationalError as e:
+            pgcode = getattr(e.orig, "pgcode", None)
+            if pgcode not in RETRYABLE_PGCODES or retries >= settings.import_lock_max_retries:
+                raise
+            retries += 1
+            logger.warning(f"Import batch hit {pgcode}; retry {retries}/{settings.import_lock_max_retries}")
+            time.sleep(min(2.0, 0.05 * 2 ** retries))
+
+
+# Current values of a batch's SKUs, via the unique index on sku_ci
+classify_lookup_sql = text(
+    "SELECT sku_ci, name, description, price FROM products WHERE sku_ci = ANY(:keys)"
+)
+_CENT = Decimal("0.01")
+
+
+def _classify_batch(
+    batch: List[Dict[str, Any]], keys: List[str], outcomes: Dict[str, str], would: Dict[str, int]
+) -> float:
+    """Dry run: count what upserting `batch` would do, without writing.
+
+    One indexed lookup per batch. Runs on the replica when it is usable (a
+    temp-table join isn't possible on a hot standby), otherwise as a read-only
+    query on the primary. Returns wall time in seconds.
+    """
+    start = time.perf_counter()
+    lookup_engine = get_replica_engine() if replica_monitor.usable() else get_engine()
+    with lookup_engine.connect() as conn:
+        existing = {r.sku_ci: r for r in conn.execute(classify_lookup_sql, {"keys": keys})}
+    for key, row in zip(keys, batch):
+        current = existing.get(key)
+        if current is None:
+            outcome = "insert"
+        else:
+            price = None if row["price"] is None else Decimal(str(row["price"])).quantize(_CENT)
+            same = (current.name, current.description, current.price) == (row["name"], row["description"], price)
+            outcome = "unchanged" if same else "update"
+        previous = outcomes.get(key)
+        if previous is not None:
+            # Also in an earlier batch: only the last occurrence counts, as in a real import
+            would[previous] -= 1
+        outcomes[key] = outcome
+        would[outcome] += 1
+    return time.perf_counter() - start
+
+
+purge_chunk_sql = text(
+    """
+    WITH doomed AS (
+        SELECT id FROM products
+        WHERE id < :before
+          AND (CAST(:active AS boolean) IS NULL OR active = CAST(:active AS boolean))
+        ORDER BY id DESC
+        LIMIT :limit
+    )
+    DELETE FROM products p
+    USING doomed
+    WHERE p.id = doomed.id
+    RETURNING p.id
+    """
+)
+
+
+def _estimate_rows(conn, active: Optional[bool]) -> int:
+    """Planner row estimate for the purge filter; avoids an exact count(*) scan."""
+    plan = conn.execute(
+        text(
+            "EXPLAIN (FORMAT JSON) SELECT 1 FROM products "
+            "WHERE CAST(:active AS boolean) IS NULL OR active = CAST(:active AS boolean)"
+        ),
+        {"active": active},
+    ).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+@celery_app.task(name="purge_products")
+def purge_products(active: Optional[bool] = None) -> Dict[str, Any]:
+    """Delete products in keyset-ordered chunks (highest id first), one transaction each.
+
+    Short transactions keep lock hold times and replica lag bounded; progress is
+    reported like an import so /uploads/progress/{task_id} can follow it.
+    """
+    task_id = purge_products.request.id  # type: ignore[attr-defined]
+    logger.info(f"Starting product purge {task_id} (active={active})")
+    try:
+        with get_engine().connect() as conn:
+            total = _estimate_rows(conn, active)
+    except Exception as e:
+        logger.warning(f"Failed to estimate purge size for {task_id}: {e}")
+        total = 0
+    init_progress(task_id, total=total)
+    update_progress(task_id, status="running", stage="purging", message="Deleting in batches")
+
+    deleted = 0
+    before = 2 ** 63 - 1
+    try:
+        while True:
+            with get_engine().begin() as conn:
+                ids = conn.execute(
+                    purge_chunk_sql,
+                    {"before": before, "active": active, "limit": settings.purge_batch_size},
+                ).scalars().all()
+            if not ids:
+                break
+            deleted += len(ids)
+            before = min(ids)
+            bump_catalog_version()
+            update_progress(task_id, processed=deleted, total=max(total, deleted))
+            if settings.purge_pause_ms:
+                time.sleep(settings.purge_pause_ms / 1000)
+
+        if deleted:
+            clear_import_hashes()
+        update_progress(task_id, status="completed", stage="completed", processed=deleted, total=deleted, message="Purge complete")
+        logger.info(f"Product purge {task_id} completed: {deleted} deleted")
+        try:
+            enqueue_event("products.bulk_deleted", {
+                "count": deleted,
+                "filter": {"active": active},
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+        except Exception:
+            pass
+        return {"status": "completed", "deleted": deleted}
+    except Exception as e:
+        logger.error(f"Product purge {task_id} failed: {e}", exc_info=True)
+        if deleted:
+            # Chunks already committed removed products that registered imports wrote
+            clear_import_hashes()
+        update_progress(task_id, status="failed", stage="purging", message=str(e))
+        return {"status": "failed", "reason": str(e), "deleted": deleted}
+
+
+@celery_app.task(name="prune_change_tombstones")
+def prune_change_tombstones() -> Dict[str, Any]:
+    """Drop change feed tombstones past retention and record the new horizon.
+
+    The horizon marker reuses the highest pruned change_seq; /products/changes
+    answers 410 for cursors behind it, since deletes they haven't seen are gone.
+    """
+    with get_session() as db:
+        horizon = db.execute(
+            text(
+                "SELECT max(change_seq) FROM product_tombstones "
+                "WHERE changed_at < now() - make_interval(days => :days)"
+            ),
+            {"days": settings.change_feed_retention_days},
+        ).scalar()
+        if horizon is None:
+            return {"pruned": 0}
+        # Also removes the previous horizon marker, which is always older
+        pruned = db.execute(
+            text("DELETE FROM product_tombstones WHERE change_seq <= :seq"), {"seq": horizon}
+        ).rowcount
+        db.execute(
+            text("INSERT INTO product_tombstones (change_seq, op) VALUES (:seq, 'horizon')"), {"seq": horizon}
+        )
+    logger.info(f"Pruned {pruned} change feed tombstones up to seq {horizon}")
+    return {"pruned": pruned, "horizon": horizon}
+
+
+@celery_app.task(name="reconcile_product_stats")
+def reconcile_product_stats() -> Dict[str, Any]:
+    """Correct drift in the /products/stats counters against a full recount."""
+    with get_session() as db:
+        drift = reconcile_stats(db)
+    if drift is None:
+        logger.info("Product stats reconcile skipped: counters busy or catalog truncated meanwhile")
+        return {"status": "skipped"}
+    if drift:
+        logger.warning(f"Product stats drift corrected: {drift}")
+    return {"status": "completed", "drift": drift}
+
+
+@celery_app.task(name="prune_error_reports")
+def prune_error_reports() -> Dict[str, Any]:
+    """Remove import error reports older than ERROR_REPORT_TTL_S."""
+    removed = prune_reports(settings.error_report_ttl_s)
+    return {"removed": removed}
+
+
+@celery_app.task(name="prune_spools")
+def prune_spools() -> Dict[str, Any]:
+    """Remove local streaming-upload spools older than SPOOL_TTL_S (Redis ones expire)."""
+    if settings.spool_backend != "local":
+        return {"status": "skipped"}
+    return {"removed": prune_local_spools()}
 
 
 @celery_app.task(name="send_webhook", bind=True, max_retries=5)
 def send_webhook(self, webhook_id: int, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     logger.debug(f"Sending webhook {webhook_id} for event {event_type}")
-    # Fetch webhook, send request, and record last response stats
+    # Read what we need and release the connection before the HTTP call: a
+    # delivery can take up to the 8s timeout, and the webhook worker runs more
+    # threads than its pool has connections
     with get_session() as db:
         wh = db.get(Webhook, webhook_id)
         if not wh:
             return {"status": "not_found"}
         if not wh.enabled or wh.event_type != event_type:
             return {"status": "skipped"}
+        url = wh.url
+
+    # Rate limiting: fixed window per webhook (e.g., 60 requests per 60s)
+    RATE_LIMIT = 60
+    WINDOW = 60
+    rl_key = f"webhook:{webhook_id}:window:{WINDOW}"
+    limited = is_rate_limited(rl_key, RATE_LIMIT, WINDOW)
+    if limited:
+        # Try again after window TTL
+        ttl = get_redis_client().ttl(rl_key)
+        delay = int(ttl) if ttl and ttl > 0 else 5
+        WEBHOOK_DELIVERIES_TOTAL.labels(str(webhook_id), "rate_limited").inc()
+        raise self.retry(countdown=delay)
 
-        # Rate limiting: fixed window per webhook (e.g., 60 requests per 60s)
-        RATE_LIMIT = 60
-        WINDOW = 60
-        rl_key = f"webhook:{wh.id}:window:{WINDOW}"
-        limited = is_rate_limited(rl_key, RATE_LIMIT, WINDOW)
-        if limited:
-            # Try again after window TTL
-            ttl = get_redis_client().ttl(rl_key)
-            delay = int(ttl) if ttl and ttl > 0 else 5
-            raise self.retry(countdown=delay)
-
-        start = time.perf_counter()
+    start = time.perf_counter()
+    code = 0
+    try:
+        with httpx.Client(timeout=8.0) as client:
+            resp = client.post(url, json=payload, headers={"Content-Type": "application/json"})
+            code = resp.status_code
+    except httpx.RequestError as e:
+        # Retry on network errors (connection, timeout, etc.)
+        _record_delivery(webhook_id, "network_error", time.perf_counter() - start)
+        raise self.retry(exc=e, countdown=2 ** self.request.retries, max_retries=3)
+    except Exception:
+        # Other errors: record but don't retry
         code = 0
-        try:
-            with httpx.Client(timeout=8.0) as client:
-                resp = client.post(wh.url, json=payload, headers={"Content-Type": "application/json"})
-                code = resp.status_code
-                # Retry on 5xx server errors
-                if 500 <= code < 600:
-                    raise self.retry(countdown=2 ** self.request.retries, max_retries=3)
-        except httpx.RequestError as e:
-            # Retry on network errors (connection, timeout, etc.)
-            raise self.retry(exc=e, countdown=2 ** self.request.retries, max_retries=3)
-        except Exception:
-            # Other errors: record but don't retry
-            code = 0
-        elapsed_ms = int((time.perf_counter() - start) * 1000)
-
-        # Update response metadata
-        wh.last_response_code = code
-        wh.last_response_time_ms = elapsed_ms
-        db.flush()
-        
-        if code == 0:
-            logger.warning(f"Webhook {webhook_id} failed with code {code}")
-        else:
-            logger.info(f"Webhook {webhook_id} sent: {code} in {elapsed_ms}ms")
+    elapsed_s = time.perf_counter() - start
+    elapsed_ms = int(elapsed_s * 1000)
+    _record_delivery(webhook_id, _delivery_outcome(code), elapsed_s)
+
+    # Update response metadata in its own short transaction
+    with get_session() as db:
+        db.execute(
+            update(Webhook)
+            .where(Webhook.id == webhook_id)
+            .values(last_response_code=code, last_response_time_ms=elapsed_ms)
+        )
+
+    # Retry on 5xx server errors. Raised outside the try above: self.retry()
+    # raises celery's Retry, which the generic handler would swallow as a failure.
+    if 500 <= code < 600 and self.request.retries < 3:
+        logger.warning(f"Webhook {webhook_id} got {code}, retrying")
+        raise self.retry(countdown=2 ** self.request.retries, max_retries=3)
+
+    if code == 0:
+        logger.warning(f"Webhook {webhook_id} failed with code {code}")
+    else:
+        logger.info(f"Webhook {webhook_id} sent: {code} in {elapsed_ms}ms")
+
+    return {"status": "sent", "status_code": code, "elapsed_ms": elapsed_ms}
+
+
+def _delivery_outcome(code: int) -> str:
+    if code == 0:
+        return "failed"
+    if 200 <= code < 300:
+        return "success"
+    return f"http_{code // 100}xx"
+
 
-        return {"status": "sent", "status_code": code, "elapsed_ms": elapsed_ms}
+def _record_delivery(webhook_id: int, outcome: str, seconds: float) -> None:
+    WEBHOOK_DELIVERY_SECONDS.labels(str(webhook_id), outcome).observe(seconds)
+    WEBHOOK_DELIVERIES_TOTAL.labels(str(webhook_id), outcome).inc()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+import logging
+import secrets
 import time
 from typing import Any, Dict, Optional
 
@@ -8,8 +10,12 @@ import redis
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 # Singleton Redis connection pool for efficiency
 _redis_pool = None
+# Separate pool without response decoding for binary payloads (upload spool chunks)
+_redis_binary_pool = None
 
 
 def get_redis_client() -> redis.Redis:
@@ -23,6 +29,17 @@ def get_redis_client() -> redis.Redis:
     return redis.Redis(connection_pool=_redis_pool)
 
 
+def get_redis_binary_client() -> redis.Redis:
+    global _redis_binary_pool
+    if _redis_binary_pool is None:
+        _redis_binary_pool = redis.ConnectionPool.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            max_connections=20,
+        )
+    return redis.Redis(connection_pool=_redis_binary_pool)
+
+
 def progress_key(task_id: str) -> str:
     return f"task:{task_id}:progress"
 
@@ -54,6 +71,74 @@ def update_progress(task_id: str, **kwargs: Any) -> None:
     set_progress(task_id, current)
 
 
+# --- Catalog version (bumped by every product write and import batch; drives list ETags) ---
+
+# One hash, so eviction or a flush drops the counter and its epoch together. The
+# random epoch is re-created when missing: a counter restarting from 0 can't
+# reproduce an ETag issued before the reset.
+CATALOG_VERSION_KEY = "catalog:etag"
+
+# Set when a bump fails in this process; the next successful Redis call rotates
+# the epoch, since the missed bump left the old version looking current
+_epoch_rotation_pending = False
+
+
+def _new_epoch() -> str:
+    return secrets.token_hex(4)
+
+
+def _rotate_pending_epoch(r: redis.Redis) -> None:
+    global _epoch_rotation_pending
+    if _epoch_rotation_pending:
+        r.hset(CATALOG_VERSION_KEY, "epoch", _new_epoch())
+        _epoch_rotation_pending = False
+
+
+def get_catalog_version() -> Optional[str]:
+    """Current catalog version token ("<epoch>.<n>"), or None if Redis is unavailable."""
+    try:
+        r = get_redis_client()
+        _rotate_pending_epoch(r)
+        epoch, n = r.hmget(CATALOG_VERSION_KEY, "epoch", "n")
+        if epoch is None:
+            r.hsetnx(CATALOG_VERSION_KEY, "epoch", _new_epoch())
+            epoch, n = r.hmget(CATALOG_VERSION_KEY, "epoch", "n")
+        return f"{epoch}.{int(n or 0)}"
+    except Exception:
+        return None
+
+
+def bump_catalog_version() -> None:
+    """Invalidate cached product reads; call after the write has committed."""
+    global _epoch_rotation_pending
+    try:
+        r = get_redis_client()
+        _rotate_pending_epoch(r)
+        r.hincrby(CATALOG_VERSION_KEY, "n", 1)
+    except Exception:
+        _epoch_rotation_pending = True
+        logger.warning("Failed to bump catalog version", exc_info=True)
+
+
+LAST_IMPORT_KEY = "catalog:last_import"
+
+
+def set_last_import(summary: Dict[str, Any]) -> None:
+    """Record the most recent completed import for catalog stats."""
+    try:
+        get_redis_client().set(LAST_IMPORT_KEY, json.dumps(summary))
+    except Exception:
+        logger.warning("Failed to record last import", exc_info=True)
+
+
+def get_last_import() -> Optional[Dict[str, Any]]:
+    try:
+        raw = get_redis_client().get(LAST_IMPORT_KEY)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
 # --- CSV import error recording ---
 
 def errors_key(task_id: str) -> str:
@@ -85,6 +170,94 @@ def get_errors_count(task_id: str) -> int:
     return int(r.llen(errors_key(task_id)) or 0)
 
 
+# --- CSV import warnings (e.g. duplicate SKUs collapsed last-wins) ---
+
+def warnings_key(task_id: str) -> str:
+    return f"task:{task_id}:warnings"
+
+
+def push_warnings(task_id: str, warnings: list[Dict[str, Any]], max_warnings: int = 1000) -> None:
+    """Push warnings to a bounded Redis list and keep a TTL, in one round trip."""
+    if not warnings:
+        return
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.lpush(warnings_key(task_id), *(json.dumps(w) for w in warnings))
+    pipe.ltrim(warnings_key(task_id), 0, max_warnings - 1)
+    pipe.expire(warnings_key(task_id), 60 * 60)
+    pipe.execute()
+
+
+def get_warnings(task_id: str, limit: int = 100) -> list[Dict[str, Any]]:
+    r = get_redis_client()
+    items = r.lrange(warnings_key(task_id), 0, max(0, limit - 1))
+    out = []
+    for raw in items:
+        try:
+            out.append(json.loads(raw))
+        except Exception:
+            continue
+    return out
+
+
+# --- Content-addressed import registry (dedup of byte-identical uploads) ---
+
+def import_hash_key(digest: str) -> str:
+    return f"import:hash:{digest}"
+
+
+def get_import_record(digest: str) -> Optional[Dict[str, Any]]:
+    raw = get_redis_client().get(import_hash_key(digest))
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except Exception:
+        return None
+
+
+def claim_import_hash(digest: str, record: Dict[str, Any], ttl: int, force: bool = False) -> bool:
+    """Register `record` as the import for `digest`.
+
+    Returns False if another import already holds the hash (unless `force`).
+    """
+    r = get_redis_client()
+    return bool(r.set(import_hash_key(digest), json.dumps(record), ex=ttl, nx=not force))
+
+
+def record_import_result(digest: str, record: Dict[str, Any], ttl: int) -> None:
+    get_redis_client().set(import_hash_key(digest), json.dumps(record), ex=ttl)
+
+
+def release_import_hash(digest: str, task_id: str) -> None:
+    """Drop the registry entry if it still belongs to `task_id` (e.g. after a failed import)."""
+    current = get_import_record(digest)
+    if current and current.get("task_id") == task_id:
+        get_redis_client().delete(import_hash_key(digest))
+
+
+def clear_import_hashes() -> int:
+    """Forget every registered import, e.g. after a bulk delete emptied the catalog.
+
+    Dedup would otherwise answer a re-upload of an already imported file with
+    the old result and import nothing. Returns the number of entries removed.
+    """
+    try:
+        r = get_redis_client()
+        removed = 0
+        batch: list[str] = []
+        for key in r.scan_iter(match=import_hash_key("*"), count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                removed += r.unlink(*batch)
+                batch.clear()
+        if batch:
+            removed += r.unlink(*batch)
+        return removed
+    except Exception:
+        logger.warning("Failed to clear the import registry", exc_info=True)
+        return 0
+
+
 # --- Simple fixed-window rate limiter (per key) ---
 
 # Lua script for atomic rate limiting (avoids race condition between INCR and EXPIRE)
@@ -3,15 +3,16 @@ from __future__ import annotations
 import time
 from typing import Any, Dict, List
 
-import httpx
 from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from .models import Webhook
-from .celery_app import celery_app
+from .producer import send_task
 
 
 async def _post_json(url: str, payload: Dict[str, Any], timeout: float = 8.0) -> int:
+    import httpx
+
     async with httpx.AsyncClient(timeout=timeout) as client:
         resp = await client.post(url, json=payload, headers={"Content-Type": "application/json"})
         return resp.status_code
@@ -52,6 +53,6 @@ def enqueue_event(event_type: str, payload: Dict[str, Any]) -> List[str]:
         webhooks = get_enabled_webhooks(db, event_type)
         task_ids: List[str] = []
         for wh in webhooks:
-            task = celery_app.send_task("send_webhook", args=[wh.id, event_type, payload])
+            task = send_task("send_webhook", args=[wh.id, event_type, payload])
             task_ids.append(task.id)
         return task_ids
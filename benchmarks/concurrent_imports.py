@@ -0,0 +1,109 @@
+"""Stress concurrent CSV imports over overlapping SKU sets.
+
+Runs N `import_csv` tasks at once (one process each, eagerly via Celery's
+`apply`) against the configured Postgres/Redis. Every file draws its SKUs from a
+shared pool in a different random order, which is the pattern that deadlocks
+file-ordered upserts. Reports deadlock aborts, lock retries and rows/sec for
+each concurrency level and exits non-zero if any import aborted.
+
+Usage:
+    python -m benchmarks.concurrent_imports --rows 20000 --overlap 0.8 --levels 1,2,4,8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+
+def _write_file(path: str, skus: List[str], seed: int) -> None:
+    rng = random.Random(seed)
+    order = list(skus)
+    rng.shuffle(order)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["sku", "name", "description", "price"])
+        for sku in order:
+            # Vary case so rows collide only through the case-insensitive key
+            cased = sku.upper() if rng.random() < 0.5 else sku
+            w.writerow([cased, f"Product {sku}", f"Seed {seed}", f"{rng.uniform(1, 500):.2f}"])
+
+
+def _init_worker() -> None:
+    # Forked children must not reuse the parent's pooled connections
+    from app.db import engine
+
+    engine.dispose(close=False)
+
+
+def _run_import(path: str) -> Dict[str, Any]:
+    from app.tasks import import_csv
+
+    start = time.perf_counter()
+    result = import_csv.apply(args=[path]).get()
+    result["elapsed_s"] = time.perf_counter() - start
+    return result
+
+
+def run_level(n: int, rows: int, overlap: float, workdir: str, seed: int) -> Dict[str, Any]:
+    shared = [f"stress-shared-{i:07d}" for i in range(int(rows * overlap))]
+    paths = []
+    for j in range(n):
+        own = [f"stress-{n}-{j}-{i:07d}" for i in range(rows - len(shared))]
+        path = os.path.join(workdir, f"stress_{n}_{j}.csv")
+        _write_file(path, shared + own, seed + j)
+        paths.append(path)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n, initializer=_init_worker) as pool:
+        results = list(pool.map(_run_import, paths))
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r.get("status") != "completed"]
+    deadlocks = [r for r in failed if "deadlock" in str(r.get("reason", "")).lower()]
+    total_rows = sum(int(r.get("processed", 0)) for r in results)
+    return {
+        "concurrency": n,
+        "rows_per_file": rows,
+        "overlap": overlap,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(total_rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "failed": len(failed),
+        "deadlock_aborts": len(deadlocks),
+        "lock_retries": sum(int(r.get("lock_retries", 0)) for r in results),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="rows per file")
+    parser.add_argument("--overlap", type=float, default=0.8, help="fraction of SKUs shared by all files")
+    parser.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    report = []
+    with tempfile.TemporaryDirectory(prefix="stress_imports_") as workdir:
+        for n in levels:
+            res = run_level(n, args.rows, args.overlap, workdir, args.seed)
+            report.append(res)
+            print(json.dumps(res))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if any(r["failed"] for r in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Deterministic synthetic product catalog generator.
+
+The same arguments always produce a byte-identical file, so benchmark runs are
+comparable across commits.
+
+Usage:
+    python -m benchmarks.generate_catalog out.csv --rows 500000 --desc-min 20 --desc-max 400 \\
+        --duplicate-ratio 0.01 --invalid-ratio 0.005 --newline-ratio 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import sys
+from typing import List, Optional
+
+_WORDS = (
+    "acme steel widget gadget premium compact deluxe classic industrial portable "
+    "wireless ergonomic heavy duty lightweight modular outdoor indoor smart eco "
+    "reinforced titanium aluminium carbon bamboo ceramic vintage pro mini max ultra"
+).split()
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    out: List[str] = []
+    size = 0
+    while size < length:
+        w = rng.choice(_WORDS)
+        out.append(w)
+        size += len(w) + 1
+    return " ".join(out)[:length]
+
+
+def generate(
+    path: str,
+    rows: int,
+    seed: int = 1,
+    desc_min: int = 20,
+    desc_max: int = 200,
+    duplicate_ratio: float = 0.0,
+    invalid_ratio: float = 0.0,
+    newline_ratio: float = 0.0,
+    sku_prefix: str = "BENCH",
+) -> None:
+    """Write a catalog CSV with `rows` data records to `path`.
+
+    - duplicate_ratio: share of rows repeating an earlier SKU (random case) to exercise dedup
+    - invalid_ratio: share of rows missing a name or carrying an unparsable price
+    - newline_ratio: share of descriptions containing quoted embedded newlines
+    """
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["sku", "name", "description", "price"])
+        for i in range(rows):
+            if i > 0 and rng.random() < duplicate_ratio:
+                sku = f"{sku_prefix}-{rng.randrange(i):08d}"
+                sku = sku.lower() if rng.random() < 0.5 else sku
+            else:
+                sku = f"{sku_prefix}-{i:08d}"
+            name = _sentence(rng, rng.randint(8, 40)).title()
+            description = _sentence(rng, rng.randint(desc_min, max(desc_min, desc_max)))
+            if rng.random() < newline_ratio:
+                cut = len(description) // 2
+                description = description[:cut] + "\n" + description[cut:]
+            price = f"{rng.uniform(0.5, 2000):.2f}"
+            if rng.random() < invalid_ratio:
+                if rng.random() < 0.5:
+                    name = ""
+                else:
+                    price = "n/a"
+            w.writerow([sku, name, description, price])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--desc-min", type=int, default=20)
+    parser.add_argument("--desc-max", type=int, default=200)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    parser.add_argument("--newline-ratio", type=float, default=0.0)
+    parser.add_argument("--sku-prefix", default="BENCH")
+    args = parser.parse_args(argv)
+    generate(
+        args.path,
+        args.rows,
+        seed=args.seed,
+        desc_min=args.desc_min,
+        desc_max=args.desc_max,
+        duplicate_ratio=args.duplicate_ratio,
+        invalid_ratio=args.invalid_ratio,
+        newline_ratio=args.newline_ratio,
+        sku_prefix=args.sku_prefix,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""End-to-end benchmark suite for imports, product reads and webhook fan-out.
+
+Runs against local Postgres/Redis configured through the usual environment
+(DATABASE_URL, REDIS_URL, ...) and, for HTTP harnesses, a running API. Use a
+scratch database: the suite writes BENCH-* products and bench webhooks.
+
+Harnesses:
+    import    import_csv rows/sec on a generated catalog (task run in-process)
+    list      GET /products latency across page depths and filters
+    get       GET /products/{id} latency
+    webhooks  webhook fan-out deliveries/sec against a local stub receiver
+              (needs a Celery worker unless --inline-webhooks is given)
+
+Results are written as JSON and compared with a stored baseline; the exit code
+is non-zero when a metric regresses beyond --tolerance.
+
+Usage:
+    python -m benchmarks.run --api-url http://localhost:8000 --rows 100000 \\
+        --output bench.json --baseline benchmarks/baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.generate_catalog import generate
+
+# Metrics where a larger value is better; everything else is a latency (lower is better)
+HIGHER_IS_BETTER_SUFFIXES = ("_rows_per_sec", "_per_sec")
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0}
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3), "p95_ms": round(p95 * 1000, 3)}
+
+
+def _time_requests(client: httpx.Client, fn: Callable[[], httpx.Response], reps: int) -> Dict[str, float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        resp = fn()
+        samples.append(time.perf_counter() - start)
+        resp.raise_for_status()
+    return _percentiles(samples)
+
+
+def bench_import(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.tasks import import_csv
+
+    fd, path = tempfile.mkstemp(prefix="bench_catalog_", suffix=".csv")
+    os.close(fd)
+    generate(
+        path,
+        args.rows,
+        seed=args.seed,
+        desc_min=args.desc_min,
+        desc_max=args.desc_max,
+        duplicate_ratio=args.duplicate_ratio,
+        invalid_ratio=args.invalid_ratio,
+        newline_ratio=args.newline_ratio,
+    )
+    start = time.perf_counter()
+    # import_csv removes its input file when done
+    result = import_csv.apply(args=[path]).get()
+    elapsed = time.perf_counter() - start
+    if result.get("status") != "completed":
+        raise RuntimeError(f"import failed: {result}")
+    return {
+        "import_rows_per_sec": round(result["processed"] / elapsed, 1),
+        "import_elapsed_s": round(elapsed, 3),
+        "import_stage_seconds": result.get("stage_seconds", {}),
+    }
+
+
+def bench_list(args: argparse.Namespace, client: httpx.Client) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for page in args.pages:
+        res = _time_requests(client, lambda: client.get("/products/", params={"page": page, "page_size": 50}), args.reps)
+        out[f"list_page_{page}_p50_ms"] = res["p50_ms"]
+        out[f"list_page_{page}_p95_ms"] = res["p95_ms"]
+    filters = {
+        "sku": {"sku": "bench-00000042"},
+        "name": {"name": "widget"},
+        "active": {"active": "true"},
+    }
+    for label, params in filters.items():
+        res = _time_requests(client, lambda: client.get("/products/", params={**params, "page_size": 50}), args.reps)
+        out[f"list_filter_{label}_p50_ms"] = res["p50_ms"]
+        out[f"list_filter_{label}_p95_ms"] = res["p95_ms"]
+    return out
+
+
+def bench_get(args: argparse.Namespace, client: httpx.Client) -> Dict[str, Any]:
+    page = client.get("/products/", params={"page_size": 200}).json()
+    ids = [item["id"] for item in page.get("items", [])]
+    if not ids:
+        return {}
+    rng = random.Random(args.seed)
+    res = _time_requests(client, lambda: client.get(f"/products/{rng.choice(ids)}"), args.reps)
+    return {"get_product_p50_ms": res["p50_ms"], "get_product_p95_ms": res["p95_ms"]}
+
+
+class _StubReceiver:
+    """Local HTTP server that counts webhook deliveries."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802 - http.server API
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self.send_response(200)
+                self.end_headers()
+                with receiver._lock:
+                    receiver.count += 1
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def bench_webhooks(args: argparse.Namespace, client: httpx.Client) -> Dict[str, Any]:
+    event = "bench.fanout"
+    stub = _StubReceiver()
+    created: List[int] = []
+    try:
+        for _ in range(args.webhooks):
+            resp = client.post("/webhooks/", json={"url": stub.url, "event_type": event, "enabled": True})
+            resp.raise_for_status()
+            created.append(resp.json()["id"])
+        expected = args.webhooks * args.events
+        start = time.perf_counter()
+        if args.inline_webhooks:
+            from app.tasks import send_webhook
+
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                jobs = [
+                    pool.submit(lambda wid=wid, n=n: send_webhook.apply(args=[wid, event, {"n": n}]).get())
+                    for n in range(args.events)
+                    for wid in created
+                ]
+                for job in jobs:
+                    job.result()
+        else:
+            from app.webhooks_service import enqueue_event
+
+            for n in range(args.events):
+                enqueue_event(event, {"n": n, "timestamp": datetime.utcnow().isoformat()})
+        deadline = time.perf_counter() + args.webhook_timeout
+        while stub.count < expected and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        return {
+            "webhook_deliveries_per_sec": round(stub.count / elapsed, 1) if elapsed > 0 else 0.0,
+            "webhook_delivered": stub.count,
+            "webhook_expected": expected,
+        }
+    finally:
+        for wid in created:
+            client.delete(f"/webhooks/{wid}")
+        stub.close()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regressions of numeric metrics beyond `tolerance`."""
+    regressions = []
+    for key, base in baseline.items():
+        cur = results.get(key)
+        if not isinstance(base, (int, float)) or not isinstance(cur, (int, float)) or base == 0:
+            continue
+        if key.endswith(HIGHER_IS_BETTER_SUFFIXES):
+            change = (base - cur) / base
+        elif key.endswith("_ms"):
+            change = (cur - base) / base
+        else:
+            continue
+        if change > tolerance:
+            regressions.append(f"{key}: {base} -> {cur} ({change:+.1%} worse)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--only", default="import,list,get,webhooks", help="comma-separated harnesses")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--desc-min", type=int, default=20)
+    parser.add_argument("--desc-max", type=int, default=200)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.01)
+    parser.add_argument("--invalid-ratio", type=float, default=0.005)
+    parser.add_argument("--newline-ratio", type=float, default=0.01)
+    parser.add_argument("--pages", type=lambda v: [int(x) for x in v.split(",")], default=[1, 10, 100, 1000])
+    parser.add_argument("--reps", type=int, default=50)
+    parser.add_argument("--webhooks", type=int, default=10)
+    parser.add_argument("--events", type=int, default=20, help="events per webhook (rate limit is 60/min)")
+    parser.add_argument("--webhook-timeout", type=float, default=60.0)
+    parser.add_argument("--inline-webhooks", action="store_true", help="deliver in-process instead of via a worker")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--update-baseline", action="store_true", help="write results to --baseline")
+    args = parser.parse_args(argv)
+
+    only = {x.strip() for x in args.only.split(",") if x.strip()}
+    results: Dict[str, Any] = {}
+    if "import" in only:
+        results.update(bench_import(args))
+    with httpx.Client(base_url=args.api_url, timeout=30.0) as client:
+        if "list" in only:
+            results.update(bench_list(args, client))
+        if "get" in only:
+            results.update(bench_get(args, client))
+        if "webhooks" in only:
+            results.update(bench_webhooks(args, client))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "rows": args.rows,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return 0
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
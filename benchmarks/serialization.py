@@ -0,0 +1,109 @@
+"""Per-request CPU of the product list serialization paths.
+
+Compares the previous path (ORM `Product` objects validated and serialized
+through PaginatedResponse/ProductOut, then encoded by FastAPI's JSONResponse)
+with the fast path used by `list_products` (column tuples encoded with orjson).
+Both include loading one page from an in-memory SQLite catalog so ORM
+hydration cost is counted; the JSON outputs are checked to be identical.
+
+Usage:
+    python -m benchmarks.serialization --page-size 200 --iterations 500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models import Product
+from app.schemas import PaginatedResponse
+from app.serialization import PRODUCT_COLUMNS, FastJSONResponse, product_row
+
+
+def _seed(session: Session, rows: int) -> None:
+    now = datetime(2025, 11, 26, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    session.add_all(
+        Product(
+            id=i,
+            sku=f"BENCH-{i:08d}",
+            name=f"Product {i}",
+            description="lorem ipsum " * 10,
+            price=Decimal("19.99") + i,
+            active=i % 7 != 0,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(1, rows + 1)
+    )
+    session.commit()
+
+
+def orm_pydantic(session: Session, page_size: int) -> bytes:
+    rows = session.execute(select(Product).order_by(Product.id.desc()).limit(page_size)).scalars().all()
+    model = PaginatedResponse(total=len(rows), page=1, page_size=page_size, items=rows)
+    # What FastAPI does with a response_model: validate, dump in JSON mode, json.dumps
+    content = TypeAdapter(PaginatedResponse).dump_python(
+        TypeAdapter(PaginatedResponse).validate_python(model), mode="json"
+    )
+    body = JSONResponse(content).body
+    session.expunge_all()
+    return body
+
+
+def fast_path(session: Session, page_size: int) -> bytes:
+    rows = session.execute(select(*PRODUCT_COLUMNS).order_by(Product.id.desc()).limit(page_size)).all()
+    return FastJSONResponse({
+        "total": len(rows),
+        "page": 1,
+        "page_size": page_size,
+        "items": [product_row(r) for r in rows],
+    }).body
+
+
+def cpu_per_call(fn: Callable[[], bytes], iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", future=True)
+    Product.__table__.create(engine)
+    with Session(engine) as session:
+        _seed(session, args.page_size)
+
+        before = orm_pydantic(session, args.page_size)
+        after = fast_path(session, args.page_size)
+        if json.loads(before) != json.loads(after):
+            print("fast path JSON differs from the pydantic path", file=sys.stderr)
+            return 1
+        old = cpu_per_call(lambda: orm_pydantic(session, args.page_size), args.iterations)
+        new = cpu_per_call(lambda: fast_path(session, args.page_size), args.iterations)
+
+    print(json.dumps({
+        "page_size": args.page_size,
+        "orm_pydantic_cpu_ms": round(old * 1000, 3),
+        "fast_path_cpu_ms": round(new * 1000, 3),
+        "speedup": round(old / new, 2) if new else None,
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""API cold-start benchmark: import time of app.main and time-to-first-request.
+
+Each sample runs in a fresh interpreter so nothing is cached in-process:
+    import    `import app.main` wall time, plus which worker-side modules
+              (Celery, task code, DB driver, httpx) that import dragged in
+    first     spawn `uvicorn app.main:app` and poll GET /health/live until it
+              answers; time from spawn to the first 200
+
+/health/live touches no dependency, so the first-request numbers don't need
+Postgres or Redis. Exits non-zero with --strict if the API import pulls in any
+worker-only module.
+
+Usage:
+    python -m benchmarks.startup --samples 5 --output startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Modules only workers need; the API imports them lazily on first use
+WORKER_ONLY_MODULES = ("celery", "kombu", "app.celery_app", "app.tasks", "httpx", "psycopg2")
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (WORKER_ONLY_MODULES,)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request(timeout_s: float) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - start < timeout_s:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/health/live").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise TimeoutError(f"API did not answer within {timeout_s}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min_ms": round(min(samples) * 1000, 1),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the first response")
+    parser.add_argument("--skip-server", action="store_true", help="only measure import time")
+    parser.add_argument("--strict", action="store_true", help="fail if app.main imports worker-only modules")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    # Run from the repo root so `app` resolves the same way for every sample
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    imports = [measure_import() for _ in range(args.samples)]
+    results: Dict[str, Any] = {
+        "import_app_main": _summary([r["seconds"] for r in imports]),
+        "worker_modules_loaded": imports[0]["loaded"],
+    }
+    if not args.skip_server:
+        results["time_to_first_request"] = _summary([measure_first_request(args.timeout) for _ in range(args.samples)])
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.strict and results["worker_modules_loaded"]:
+        print(f"API import loaded worker-only modules: {results['worker_modules_loaded']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,18 +30,36 @@ if [ -f "/app/alembic.ini" ]; then
   alembic upgrade head || { echo "Migrations failed" >&2; exit 1; }
 fi
 
+# Prometheus multiprocess mode: uvicorn --workers and Celery prefork children
+# each write samples here so one scrape aggregates every process. Clear it on
+# start, since samples from a previous run's PIDs would be counted again.
+case "${SERVICE}" in
+  api|worker|import-worker|webhook-worker)
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/acme_prometheus}"
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    ;;
+esac
+
 echo "Starting service: ${SERVICE} (HOST=${HOST:-}, PORT=${PORT:-}, UVICORN_WORKERS=${UVICORN_WORKERS:-})"
 case "${SERVICE}" in
   api)
     # Always bind to 0.0.0.0 inside container to ensure host reachability
     exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "${UVICORN_WORKERS:-2}"
     ;;
-  worker)
-    # Celery worker
-    exec celery -A app.celery_app.celery_app worker --loglevel="${CELERY_LOGLEVEL:-info}" --concurrency="${CELERY_CONCURRENCY:-2}"
+  worker|import-worker|webhook-worker)
+    # Celery worker; queues, pool type, concurrency and prefetch come from the
+    # role profile in app/config.py (CELERY_CONCURRENCY still overrides)
+    exec celery -A app.celery_app.celery_app worker --loglevel="${CELERY_LOGLEVEL:-info}" \
+      ${CELERY_CONCURRENCY:+--concurrency="$CELERY_CONCURRENCY"} -n "${SERVICE}@%h"
+    ;;
+  beat)
+    # Periodic task scheduler; run exactly one
+    exec celery -A app.celery_app.celery_app beat --loglevel="${CELERY_LOGLEVEL:-info}" \
+      --schedule=/tmp/celerybeat-schedule
     ;;
   *)
-    echo "Unknown SERVICE='${SERVICE}'. Use 'api' or 'worker'" >&2
+    echo "Unknown SERVICE='${SERVICE}'. Use 'api', 'worker', 'import-worker', 'webhook-worker' or 'beat'" >&2
     exit 1
     ;;
  esac
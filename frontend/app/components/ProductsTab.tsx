@@ -117,7 +117,10 @@ export default function ProductsTab() {
   async function deleteAll() {
     if (!confirm("Delete ALL products? This cannot be undone.")) return;
     try {
-      await del(`/products/?confirm=true`);
+      const res = await del<{ mode?: string; task_id?: string }>(`/products/?confirm=true`);
+      if (res?.mode === "background") {
+        alert(`Bulk delete is running in the background (task ${res.task_id}).`);
+      }
       await load();
     } catch (e: any) {
       alert(e?.message || "Bulk delete failed");
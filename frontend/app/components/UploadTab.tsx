@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useRef, useState, useCallback } from "react";
-import { postForm, subscribeSSE, getJSON } from "@/lib/api";
+import { API_BASE, postForm, subscribeSSE, getJSON } from "@/lib/api";
 
 export default function UploadTab() {
   const [taskId, setTaskId] = useState<string | null>(null);
@@ -11,6 +11,10 @@ export default function UploadTab() {
   const [busy, setBusy] = useState(false);
   const [startMs, setStartMs] = useState<number | null>(null);
   const [dragActive, setDragActive] = useState(false);
+  const [dryRun, setDryRun] = useState(false);
+  // Read by handleFile, which the memoized drop handler captures once
+  const dryRunRef = useRef(false);
+  dryRunRef.current = dryRun;
 
   // Subscribe to SSE when we have a taskId
   useEffect(() => {
@@ -52,7 +56,7 @@ export default function UploadTab() {
     try {
       const form = new FormData();
       form.append("file", file);
-      const res = await postForm<{ task_id: string }>(`/uploads/csv`, form);
+      const res = await postForm<{ task_id: string }>(`/uploads/csv${dryRunRef.current ? "?dry_run=true" : ""}`, form);
       setTaskId(res.task_id);
       // Immediately set status to queued so UI shows the active state
       setProgress({ status: "queued", processed: 0, total: 0 });
@@ -128,7 +132,7 @@ export default function UploadTab() {
         >
           <input
             type="file"
-            accept=".csv"
+            accept=".csv,.gz,.zst,.zip"
             onChange={handleChange}
             className="absolute inset-0 w-full h-full opacity-0 cursor-pointer"
             disabled={busy}
@@ -141,7 +145,7 @@ export default function UploadTab() {
             </div>
             <div>
               <p className="text-lg font-medium text-zinc-900 dark:text-zinc-100">
-                {busy ? "Starting upload..." : "Drop your CSV file here"}
+                {busy ? "Starting upload..." : "Drop your CSV file here (.csv, .csv.gz, .csv.zst, .zip)"}
               </p>
               <p className="text-sm text-zinc-500 mt-1">or click to browse</p>
             </div>
@@ -149,6 +153,13 @@ export default function UploadTab() {
         </div>
       )}
 
+      {!active && !completed && (
+        <label className="flex items-center gap-2 text-sm text-zinc-600 dark:text-zinc-400">
+          <input type="checkbox" checked={dryRun} onChange={(e) => setDryRun(e.target.checked)} disabled={busy} />
+          Dry run (validate and preview changes without writing)
+        </label>
+      )}
+
       {/* Active State */}
       {active && (
         <div className="bg-white dark:bg-zinc-900 rounded-xl border border-zinc-200 dark:border-zinc-800 p-6 shadow-sm">
@@ -215,8 +226,14 @@ export default function UploadTab() {
               </h3>
               <p className={`text-sm ${status === 'completed' ? 'text-green-700 dark:text-green-300' : 'text-red-700 dark:text-red-300'
                 }`}>
-                Processed {processed.toLocaleString()} rows with {errors.length} errors.
+                Processed {processed.toLocaleString()} rows with {(progress?.errors ?? errors.length).toLocaleString()} errors.
               </p>
+              {progress?.dry_run && progress?.would && (
+                <p className="text-sm text-green-700 dark:text-green-300">
+                  Dry run: would insert {Number(progress.would.insert).toLocaleString()}, update {Number(progress.would.update).toLocaleString()},
+                  leave {Number(progress.would.unchanged).toLocaleString()} unchanged, reject {Number(progress.rejected ?? 0).toLocaleString()}.
+                </p>
+              )}
             </div>
             <button
               onClick={() => { setTaskId(null); setProgress(null); setErrors([]); setStartMs(null); }}
@@ -231,8 +248,16 @@ export default function UploadTab() {
       {/* Errors Section */}
       {(active || completed) && groupedArr.length > 0 && (
         <div className="border border-zinc-200 dark:border-zinc-800 rounded-xl overflow-hidden">
-          <div className="bg-zinc-50 dark:bg-zinc-800/50 px-4 py-3 border-b border-zinc-200 dark:border-zinc-800">
+          <div className="bg-zinc-50 dark:bg-zinc-800/50 px-4 py-3 border-b border-zinc-200 dark:border-zinc-800 flex items-center justify-between">
             <h3 className="font-medium text-zinc-900 dark:text-zinc-100">Import Errors</h3>
+            {taskId && (
+              <a
+                href={`${API_BASE}/uploads/errors/${taskId}/report?format=csv`}
+                className="text-sm text-blue-600 dark:text-blue-400 hover:underline"
+              >
+                Download full report (CSV)
+              </a>
+            )}
           </div>
           <div className="overflow-x-auto">
             <table className="w-full text-sm text-left">
@@ -1,5 +1,8 @@
 export const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
 
+// The API is cross-origin; send its cookies (the read-your-writes pin) back with every call
+const CREDENTIALS: RequestCredentials = 'include';
+
 async function handle(resp: Response) {
   if (!resp.ok) {
     let detail: any = undefined;
@@ -12,6 +15,7 @@ async function handle(resp: Response) {
 
 export async function getJSON<T>(path: string, init?: RequestInit): Promise<T> {
   const resp = await fetch(`${API_BASE}${path}`, {
+    credentials: CREDENTIALS,
     ...init,
     headers: {
       'Accept': 'application/json',
@@ -26,6 +30,7 @@ export async function postForm<T>(path: string, form: FormData): Promise<T> {
   const resp = await fetch(`${API_BASE}${path}`, {
     method: 'POST',
     body: form,
+    credentials: CREDENTIALS,
   });
   return handle(resp);
 }
@@ -35,6 +40,7 @@ export async function postJSON<T>(path: string, body: any, init?: RequestInit):
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
+    credentials: CREDENTIALS,
     ...init,
   });
   return handle(resp);
@@ -45,17 +51,18 @@ export async function putJSON<T>(path: string, body: any): Promise<T> {
     method: 'PUT',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
+    credentials: CREDENTIALS,
   });
   return handle(resp);
 }
 
 export async function del<T>(path: string): Promise<T> {
-  const resp = await fetch(`${API_BASE}${path}`, { method: 'DELETE' });
+  const resp = await fetch(`${API_BASE}${path}`, { method: 'DELETE', credentials: CREDENTIALS });
   return handle(resp);
 }
 
 export function subscribeSSE(path: string, onMessage: (data: any) => void): EventSource {
-  const es = new EventSource(`${API_BASE}${path}`);
+  const es = new EventSource(`${API_BASE}${path}`, { withCredentials: true });
   es.addEventListener('progress', (ev) => {
     try {
       const payload = JSON.parse((ev as MessageEvent).data);
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.change_feed import CHANGES_SQL, HORIZON_SQL, CursorExpired, fetch_changes
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers the two feed queries from canned rows, recording what ran."""
+
+    def __init__(self, horizon, rows):
+        self.horizon = horizon
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append(statement)
+        if statement is HORIZON_SQL:
+            return FakeResult([self.horizon])
+        if statement is CHANGES_SQL:
+            return FakeResult(self.rows)
+        raise AssertionError(f"unexpected statement {statement}")
+
+
+def _tombstone(seq):
+    return SimpleNamespace(change_seq=seq, op="delete", product_id=seq, sku=f"SKU-{seq}", visible=True)
+
+
+def test_since_zero_is_served_after_pruning():
+    db = FakeSession(horizon=100, rows=[_tombstone(150)])
+    items, next_since, _, _ = fetch_changes(db, 0, 10)
+    assert [item["seq"] for item in items] == [150]
+    assert next_since == 150
+    assert HORIZON_SQL not in db.executed
+
+
+def test_cursor_behind_horizon_expires():
+    db = FakeSession(horizon=100, rows=[])
+    with pytest.raises(CursorExpired) as exc:
+        fetch_changes(db, 50, 10)
+    assert exc.value.horizon == 100
+
+
+def test_cursor_at_horizon_is_served():
+    db = FakeSession(horizon=100, rows=[_tombstone(150)])
+    items, next_since, _, _ = fetch_changes(db, 100, 10)
+    assert next_since == 150
+
+
+def test_page_stops_at_first_change_of_a_running_transaction():
+    rows = [_tombstone(150), SimpleNamespace(**{**vars(_tombstone(160)), "visible": False}), _tombstone(170)]
+    items, next_since, has_more, held_back = fetch_changes(FakeSession(horizon=None, rows=rows), 100, 10)
+    assert [item["seq"] for item in items] == [150]
+    assert next_since == 150
+    assert not has_more
+    assert held_back
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+
+from app import tasks
+from app.config import settings
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+
+class FakeEngine:
+    """Hands out one recording connection per transaction."""
+
+    def __init__(self):
+        self.transactions = []
+
+    @contextmanager
+    def begin(self):
+        conn = FakeConnection()
+        self.transactions.append(conn)
+        yield conn
+
+
+def test_batch_is_upserted_in_one_statement(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(tasks, "get_engine", lambda: engine)
+    monkeypatch.setattr(settings, "import_lock_buckets", 0)
+    rows = [
+        {"sku": "A-1", "name": "Alpha", "description": None, "price": 1.5},
+        {"sku": "b-2", "name": "Beta", "description": "second", "price": None},
+        {"sku": "C-3", "name": "Gamma", "description": "", "price": 3.0},
+    ]
+
+    _, retries = tasks._execute_batch(rows, ["a-1", "b-2", "c-3"])
+
+    assert retries == 0
+    [conn] = engine.transactions
+    # A list of parameter sets would be an executemany, i.e. one INSERT (and one
+    # run of the stats triggers) per row
+    [(statement, params)] = conn.executed
+    assert statement is tasks.upsert_batch_sql
+    assert params == {
+        "skus": ["A-1", "b-2", "C-3"],
+        "names": ["Alpha", "Beta", "Gamma"],
+        "descriptions": [None, "second", ""],
+        "prices": [1.5, None, 3.0],
+    }
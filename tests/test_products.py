@@ -0,0 +1,47 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.routers import products
+from app.schemas import ProductCreate
+from app.serialization import FastJSONResponse
+
+
+class FakeSession:
+    """Fills in server defaults on refresh, like the database would."""
+
+    def add(self, prod):
+        self.prod = prod
+
+    def flush(self):
+        pass
+
+    def refresh(self, prod):
+        prod.id = 7
+        prod.price = Decimal(str(prod.price))
+        prod.created_at = prod.updated_at = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+    def commit(self):
+        pass
+
+
+def test_create_responds_in_the_read_format(monkeypatch):
+    monkeypatch.setattr(products, "bump_catalog_version", lambda: None)
+    monkeypatch.setattr(products, "enqueue_event", lambda *args: None)
+
+    payload = ProductCreate(sku="A-1", name="Alpha", description=None, price=9.5, active=None)
+    response = products.create_product(payload, db=FakeSession())
+
+    assert isinstance(response, FastJSONResponse)
+    assert response.status_code == 201
+    assert response.headers["ETag"] == '"p7-1792411200000000"'
+    assert json.loads(response.body) == {
+        "sku": "A-1",
+        "name": "Alpha",
+        "description": None,
+        "price": 9.5,
+        "active": True,
+        "id": 7,
+        "created_at": "2026-10-19T12:00:00Z",
+        "updated_at": "2026-10-19T12:00:00Z",
+    }
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import db, main
+from app.config import settings
+
+
+def _request(method="GET", cookie=None):
+    headers = [(b"cookie", f"{db.READ_YOUR_WRITES_COOKIE}={cookie}".encode())] if cookie else []
+    return Request({"type": "http", "method": method, "path": "/products", "headers": headers, "query_string": b""})
+
+
+@pytest.fixture
+def healthy_replica(monkeypatch):
+    """A usable replica, with both session kinds replaced by tagged stand-ins."""
+
+    @contextmanager
+    def primary_session():
+        yield SimpleNamespace(info={"tag": "primary"})
+
+    def replica_session(bind):
+        return SimpleNamespace(info={"tag": "replica"}, rollback=lambda: None, close=lambda: None)
+
+    monkeypatch.setattr(db, "ReplicaSessionLocal", replica_session)
+    monkeypatch.setattr(db, "get_replica_engine", lambda: None)
+    monkeypatch.setattr(db, "get_session", primary_session)
+    monkeypatch.setattr(db.replica_monitor, "usable", lambda: True)
+
+
+def _read_session(request):
+    dependency = db.get_read_db(request)
+    session = next(dependency)
+    dependency.close()
+    return session
+
+
+def test_reads_go_to_the_replica_without_the_cookie(healthy_replica):
+    session = _read_session(_request())
+    assert session.info["tag"] == "replica"
+    assert session.info["replica"] is True
+
+
+def test_fresh_cookie_forces_a_primary_read(healthy_replica):
+    session = _read_session(_request(cookie=str(time.time() + 10)))
+    assert session.info["tag"] == "primary"
+    assert session.info["replica"] is False
+
+
+def test_expired_cookie_reads_from_the_replica(healthy_replica):
+    session = _read_session(_request(cookie=str(time.time() - 1)))
+    assert session.info["tag"] == "replica"
+
+
+def test_write_sets_a_cross_site_cookie(monkeypatch):
+    monkeypatch.setattr(settings, "replica_database_url", "postgresql://replica/acme")
+    monkeypatch.setattr(main, "rw_cookie_samesite", "none")
+
+    async def call_next(request):
+        return Response(status_code=201)
+
+    response = asyncio.run(main.read_your_writes(_request(method="POST"), call_next))
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{db.READ_YOUR_WRITES_COOKIE}=")
+    assert "SameSite=none" in cookie
+    assert "Secure" in cookie
@@ -0,0 +1,39 @@
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.spool import LocalSpool, prune_local_spools
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "spool_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "spool_max_pending_chunks", 2)
+    monkeypatch.setattr(settings, "spool_idle_timeout_s", 0.2)
+    return tmp_path
+
+
+def test_writer_waits_for_the_reader(spool_dir):
+    writer, reader = LocalSpool("s1"), LocalSpool("s1")
+    writer.write(b"one")
+    writer.write(b"two")
+    with pytest.raises(TimeoutError):
+        writer.write(b"three")
+
+    assert reader.next_chunk(1) == b"one"
+    writer.write(b"three")
+    writer.finish()
+    assert [reader.next_chunk(1) for _ in range(3)] == [b"two", b"three", b""]
+
+
+def test_stale_spools_are_pruned(spool_dir, monkeypatch):
+    monkeypatch.setattr(settings, "spool_ttl_s", 60)
+    LocalSpool("stale").write(b"never read")
+    LocalSpool("fresh").write(b"in flight")
+    old = time.time() - 120
+    os.utime(spool_dir / "stale", (old, old))
+
+    assert prune_local_spools() == 1
+    assert sorted(os.listdir(spool_dir)) == ["fresh"]
@@ -0,0 +1,53 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from app.routers import uploads
+
+
+class FakeRegistry:
+    """The content-hash registry, keyed by digest."""
+
+    def __init__(self):
+        self.records = {}
+
+    def get(self, digest):
+        return self.records.get(digest)
+
+    def claim(self, digest, record, ttl, force=False):
+        if digest in self.records and not force:
+            return False
+        self.records[digest] = record
+        return True
+
+    def release(self, digest, task_id):
+        if (self.records.get(digest) or {}).get("task_id") == task_id:
+            del self.records[digest]
+
+
+def test_failed_enqueue_releases_the_claim_and_the_file(monkeypatch):
+    registry = FakeRegistry()
+    sent = []
+
+    def broker_down(name, args, **kwargs):
+        sent.append(args[0])
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(uploads, "get_import_record", registry.get)
+    monkeypatch.setattr(uploads, "claim_import_hash", registry.claim)
+    monkeypatch.setattr(uploads, "release_import_hash", registry.release)
+    monkeypatch.setattr(uploads, "send_task", broker_down)
+
+    upload = UploadFile(io.BytesIO(b"sku,name\nA-1,Alpha\n"), filename="products.csv")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(uploads.upload_csv(upload, force=False, dry_run=False))
+
+    assert exc.value.status_code == 503
+    [temp_path] = sent
+    assert not os.path.exists(temp_path)
+    # A retry of the same bytes imports instead of returning the never-queued task
+    assert registry.records == {}